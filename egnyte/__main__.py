@@ -9,7 +9,7 @@ import datetime
 import codecs
 from contextlib import closing
 
-from egnyte import client, configuration, exc, base
+from egnyte import client, configuration, exc, base, tracing
 
 
 parser_kwargs = dict(formatter_class=lambda prog: argparse.HelpFormatter(prog, max_help_position=50))
@@ -20,6 +20,7 @@ def create_main_parser():
     main.add_argument("-c", "--config-path", help="Path to config file")
     main.add_argument('-v', '--verbose', action='count', dest='verbosity', help="Be more verbose. Can be repeated for debugging", default=0)
     main.add_argument('--impersonate', metavar="USERNAME", help="Impersonate another user (username or email)", default=None)
+    main.add_argument('--trace', metavar="FILE", help="Write information about every API request to a file (as JSON lines)", default=None)
 
     subparsers = main.add_subparsers()
 
@@ -104,6 +105,9 @@ def create_main_parser():
     parser_upload.add_argument('paths', nargs='+', help="Paths (files to directories) to upload")
     parser_upload.add_argument('target', help="Path in Cloud File System to upload to")
     parser_upload.add_argument('-x', '--exclude', action='append', default=None, help='Exclude items that match this glob pattern')
+    parser_upload.add_argument('--resume', action='store_const', const=True, default=False, help="Continue interrupted uploads of large files instead of starting over")
+    parser_upload.add_argument('-j', '--jobs', type=int, default=1, help="Number of files to upload concurrently (default 1)")
+    parser_upload.add_argument('--skip-unchanged', action='store_const', const=True, default=False, help="Don't upload files that already exist in the cloud with the same checksum")
 
     parser_download = subparsers.add_parser('download', help='download files from Egnyte', **parser_kwargs)
     parser_download.set_defaults(command="download")
@@ -111,6 +115,9 @@ def create_main_parser():
     parser_download.add_argument('paths', nargs='+', help="Paths (files to directories) to download")
     parser_download.add_argument('--target', help="Local directory to put downloaded files and directories in", default='.')
     parser_download.add_argument('--overwrite', action='store_const', const=True, default=False, help="Delete local files and directories that conflict with cloud content")
+    parser_download.add_argument('--resume', action='store_const', const=True, default=False, help="Treat existing local files as interrupted downloads and download only the missing part")
+    parser_download.add_argument('-j', '--jobs', type=int, default=1, help="Number of folders to list and files to download concurrently (default 1)")
+    parser_download.add_argument('--sync', action='store_const', const=True, default=False, help="Skip local files that are the same as cloud files, replace those that are different")
 
     parser_settings = subparsers.add_parser('settings', help='show domain settings', **parser_kwargs)
     parser_settings.set_defaults(command="settings")
@@ -141,6 +148,7 @@ def to_json(obj):
 
 class Commands(object):
     _config = None
+    _trace = None
     config_keys = ('login', 'password', 'domain', 'api_key', 'access_token', 'timeout')
     STATUS_CMD_NOT_FOUND = 1
     STATUS_API_ERROR = 2
@@ -188,11 +196,18 @@ class Commands(object):
                 raise
             print(repr(e))
             return self.STATUS_API_ERROR
+        finally:
+            if self._trace is not None:
+                self._trace.fp.close()
 
     def get_client(self):
         result = client.EgnyteClient(self.config)
         if self.args.impersonate is not None:
             result.impersonate(self.args.impersonate)
+        if self.args.trace is not None:
+            if self._trace is None:
+                self._trace = tracing.JsonLinesTrace(open(self.args.trace, "a"))
+            result.add_hook(self._trace)
         return result
 
     def get_access_token(self):
@@ -330,11 +345,11 @@ class Commands(object):
 
     def cmd_upload(self):
         api = self.get_client()
-        api.bulk_upload(self.args.paths, self.args.target, self.args.exclude, self.transfer_callbacks())
+        api.bulk_upload(self.args.paths, self.args.target, self.args.exclude, self.transfer_callbacks(), self.args.resume, self.args.jobs, self.args.skip_unchanged)
 
     def cmd_download(self):
         api = self.get_client()
-        api.bulk_download(self.args.paths, self.args.target, self.args.overwrite, self.transfer_callbacks())
+        api.bulk_download(self.args.paths, self.args.target, self.args.overwrite, self.transfer_callbacks(), self.args.resume, self.args.jobs, self.args.sync)
 
     def cmd_settings(self):
         self.print_json(self.get_client().settings)
@@ -363,6 +378,9 @@ class Commands(object):
 class VerboseCallbacks(client.ProgressCallbacks):
     """Progress callbacks used when sys.stdout is a file or a pipe"""
 
+    def __init__(self):
+        self.local_paths = {}  # local paths of files being transferred, by cloud path
+
     def write(self, text, force_newline=False):
         print(text)
 
@@ -374,11 +392,17 @@ class VerboseCallbacks(client.ProgressCallbacks):
 
     def download_start(self, local_path, cloud_file, size):
         self.write("Downloading %s" % local_path)
-        self.current = local_path
+        self.local_paths[cloud_file.path] = local_path
+
+    def download_finish(self, cloud_file):
+        self.local_paths.pop(cloud_file.path, None)
 
     def upload_start(self, local_path, cloud_file, size):
         self.write("Uploading %s" % local_path)
-        self.current = local_path
+        self.local_paths[cloud_file.path] = local_path
+
+    def upload_finish(self, cloud_file):
+        self.local_paths.pop(cloud_file.path, None)
 
     def creating_directory(self, cloud_folder):
         self.write("Creating directory %s" % cloud_folder.path)
@@ -395,6 +419,7 @@ class TerminalCallbacks(VerboseCallbacks):
     force_newline = False
 
     def __init__(self):
+        super(TerminalCallbacks, self).__init__()
         self.last_len = 0
 
     def write(self, text, force_newline=None):
@@ -412,17 +437,23 @@ class TerminalCallbacks(VerboseCallbacks):
         sys.stdout.flush()
         self.last_len = len(text)
 
+    def local_path(self, cloud_file):
+        return self.local_paths.get(cloud_file.path, cloud_file.path)
+
     def download_progress(self, cloud_file, size, downloaded):
-        self.write("Downloading %s, %d%% complete" % (self.current, (downloaded * 100) / size))
+        self.write("Downloading %s, %d%% complete" % (self.local_path(cloud_file), (downloaded * 100) / size))
 
     def upload_progress(self, cloud_file, size, uploaded):
-        self.write("Uploading %s, %d%%" % (self.current, (uploaded * 100) / size))
+        if size is None:  # uploading a stream
+            self.write("Uploading %s, %d bytes sent" % (self.local_path(cloud_file), uploaded))
+        else:
+            self.write("Uploading %s, %d%%" % (self.local_path(cloud_file), (uploaded * 100) / size))
 
     def download_finish(self, cloud_file):
-        self.write("Downloaded %s" % self.current)
+        self.write("Downloaded %s" % self.local_paths.pop(cloud_file.path, cloud_file.path))
 
     def upload_finish(self, cloud_file):
-        self.write("Uploaded %s" % self.current)
+        self.write("Uploaded %s" % self.local_paths.pop(cloud_file.path, cloud_file.path))
 
 
 def main():
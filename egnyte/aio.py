@@ -0,0 +1,658 @@
+"""
+Client for use with asyncio.
+
+Requires aiohttp (install with 'pip install egnyte[async]').
+It uses the same URL templates, request parameters and error handling as the blocking client,
+but all methods that talk to the API are coroutines. Attributes of resources are not fetched lazily,
+use 'await obj.fetch()' to get them.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    raise ImportError("egnyte.aio requires aiohttp, install it with 'pip install egnyte[async]'")
+
+from egnyte import audits, base, configuration, events, exc, resources
+
+
+class _Response(object):
+    """Fully read aiohttp response, that can be checked by exc.ErrorMapping like requests' Response"""
+
+    def __init__(self, response, content):
+        self.status_code = response.status
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.content = content
+
+    @classmethod
+    async def read(cls, response):
+        try:
+            return cls(response, await response.read())
+        finally:
+            response.release()
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _query(params):
+    """
+    Convert request parameters to a form accepted by aiohttp.
+    Values are encoded like requests does: list values are repeated and other values are converted with str.
+    """
+    result = []
+    for key, value in (params or {}).items():
+        for item in (value if isinstance(value, (list, tuple)) else (value,)):
+            result.append((key, item if isinstance(item, str) else str(item)))
+    return result
+
+
+def _sha512(data):
+    return hashlib.sha512(data).hexdigest()
+
+
+async def _next(iterator, default=None):
+    """Get next item of an asynchronous iterator, or default if it is exhausted."""
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return default
+
+
+async def _split_into_chunks(source, chunk_size):
+    """
+    Asynchronous version of base.split_stream_into_chunks, that generates chunks as bytes.
+    Asynchronous iterables are read on the event loop, other sources (file-like objects and iterables)
+    are read in the default executor, so blocking reads don't stall the loop.
+    """
+    if hasattr(source, '__aiter__'):
+        buffer = bytearray()
+        async for block in source:
+            if isinstance(block, str):
+                block = block.encode('utf-8')
+            buffer += block
+            while len(buffer) >= chunk_size:
+                yield bytes(memoryview(buffer)[:chunk_size])
+                del buffer[:chunk_size]
+        if buffer:
+            yield bytes(buffer)
+    else:
+        loop = asyncio.get_event_loop()
+        chunks = base.split_stream_into_chunks(source, chunk_size)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk.fp.getvalue()
+
+
+class AsyncSession(object):
+    """
+    Provides persistent HTTPS connections to the Egnyte API, for use with asyncio.
+    Should be closed with 'await session.close()' or used as 'async with' context manager.
+    Number of connections is limited by 'pool_maxsize' config key (default: 100).
+    Request hooks get only ttfb and total timings.
+    """
+    get_url = base.Session.get_url
+
+    def __init__(self, config=None, rate_limiter=None, retry_policy=None, metrics=None):
+        self.config = config if isinstance(config, dict) else configuration.load(config)
+        self._url_prefix = base.get_url_prefix(self.config)
+        self._session = None
+        self._headers = {}
+        if 'access_token' in self.config:
+            self._headers['Authorization'] = 'Bearer %s' % self.config['access_token']
+        self.rate_limiter = rate_limiter or base.get_rate_limiter(self.config)
+        self.retry_policy = retry_policy or base.RetryPolicy.from_config(self.config)
+        if metrics is None and self.config.get('metrics'):
+            metrics = base.Metrics()
+        self.metrics = metrics
+        self._hooks = []
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=int(self.config.get('pool_maxsize', 100)),
+                                             force_close=not self.config.get('keep_alive', True))
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def _respect_limits(self):
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve()
+            if delay > 0:
+                if self.metrics is not None:
+                    self.metrics.rate_limited(delay)
+                await asyncio.sleep(delay)
+
+    async def _request(self, method, url, stream=False, params=None, headers=None, **kwargs):
+        """
+        Send a request, retrying according to retry_policy.
+        Returns a fully read response, unless stream is True - then the aiohttp response itself is returned.
+        """
+        await self._respect_limits()
+        timeout = int(self.config.get("timeout")) if self.config.get("timeout") is not None else base.DEFAULT_TIMEOUT
+        kwargs['timeout'] = aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout)
+        kwargs['headers'] = dict(self._headers, **(headers or {}))
+        kwargs['params'] = _query(params)
+        template = getattr(url, 'template', url)
+        sent = base._body_size(kwargs.get('data'), headers)
+        rewind = base._rewinder(kwargs.get('data'))
+        attempt = over_quota = 0
+        while True:
+            info = None
+            if self._hooks:
+                info = dict(method=method, url=str(url), template=template, params=params,
+                            attempt=attempt + over_quota, timestamp=time.time())
+                for hooks in self._hooks:
+                    hooks.before_request(info)
+            response = error = delay = ttfb = None
+            received = 0
+            start = time.time()
+            try:
+                response = await self._get_session().request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+                attempt += 1
+                delay = self.retry_policy.retry_delay(attempt) if rewind is not None else None
+            else:
+                ttfb = time.time() - start
+                if response.headers.get('x-mashery-error-code') == 'ERR_403_DEVELOPER_OVER_QPS':
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.over_quota()
+                    over_quota += 1
+                    delay = self.retry_policy.over_quota_delay(over_quota, response) if rewind is not None else None
+                elif response.status in self.retry_policy.statuses:
+                    attempt += 1
+                    delay = self.retry_policy.retry_delay(attempt, response) if rewind is not None else None
+                else:
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.succeeded()
+                    self.retry_policy.succeeded()
+                if delay is None and not stream:
+                    response = await _Response.read(response)
+                    received = len(response.content)
+                else:
+                    received = int(response.headers.get('content-length', 0))
+                    if delay is not None:
+                        response.release()
+            duration = time.time() - start
+            status = None if response is None else response.status_code if isinstance(response, _Response) else response.status
+            if self.metrics is not None:
+                self.metrics.request(method, template, status, duration, sent, received)
+            if info is not None:
+                info.update(status=status, error=repr(error) if error is not None else None, retry_delay=delay,
+                            timings=dict(dns=None, connect=None, tls=None, ttfb=ttfb, total=duration))
+                for hooks in self._hooks:
+                    hooks.after_request(info)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            if self.metrics is not None:
+                self.metrics.retry(method, template, delay)
+            await asyncio.sleep(delay)
+            rewind()
+            await self._respect_limits()
+
+    add_hook = base.Session.add_hook
+    remove_hook = base.Session.remove_hook
+    _body = staticmethod(base.Session._body)
+
+    async def GET(self, url, **kwargs):
+        return await self._request('GET', url, allow_redirects=False, **kwargs)
+
+    async def POST(self, url, json_data=None, **kwargs):
+        data, headers = self._body(json_data, kwargs)
+        return await self._request('POST', url, data=data, headers=headers, **kwargs)
+
+    async def PATCH(self, url, json_data=None, **kwargs):
+        data, headers = self._body(json_data, kwargs)
+        return await self._request('PATCH', url, data=data, headers=headers, **kwargs)
+
+    async def DELETE(self, url, **kwargs):
+        return await self._request('DELETE', url, **kwargs)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+async def _check_stream(error_mapping, response, *ok_statuses):
+    """Check status of a streamed response, reading it only if it's an error"""
+    if response.status not in (ok_statuses or error_mapping.ok_statuses):
+        error_mapping.check_response(await _Response.read(response), *ok_statuses)
+    return response
+
+
+class AsyncFileDownload(object):
+    """
+    Provides the file length and other metadata.
+    Delegates reads to underlying aiohttp response.
+    """
+
+    def __init__(self, response, file):
+        self.response = response
+        self.file = file
+
+    def __len__(self):
+        return int(self.response.headers['content-length'])
+
+    async def read(self):
+        """Read the whole content, then close the source."""
+        with self:
+            return await self.response.read()
+
+    async def iter_content(self, chunk_size=16 * 1024):
+        async for chunk in self.response.content.iter_chunked(chunk_size):
+            yield chunk
+
+    async def write_to(self, fp, progress_callback=None):
+        """
+        Copy data to a file, then close the source.
+        Optional progress_callback should have the signature of ProgressCallbacks.download_progress
+        """
+        downloaded = 0
+        with self:
+            async for chunk in self.iter_content():
+                fp.write(chunk)
+                if progress_callback is not None:
+                    downloaded += len(chunk)
+                    progress_callback(self.file, len(self), downloaded)
+
+    async def save_to(self, path, progress_callback=None):
+        """
+        Create a new file and save the contents
+        Optional progress_callback should have the signature of ProgressCallbacks.download_progress
+        """
+        with open(path, "wb") as fp:
+            await self.write_to(fp, progress_callback)
+
+    def close(self):
+        self.response.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _AsyncResource(base.Resource):
+    """Base for resources of the asyncio client."""
+
+    def __getattr__(self, name):
+        if name in self._lazy_attributes:
+            raise AttributeError(self, name, "Use 'await fetch()' to get attributes")
+        raise AttributeError(self, name)
+
+    async def fetch(self):
+        """Get attributes of this object from the cloud. Returns them as a dictionary."""
+        json = exc.default.check_json_response(await self._client.GET(self._url))
+        self._update_attributes(json)
+        return json
+
+    async def check(self):
+        """
+        Check if this object exists in the cloud and current user has read permissions on it.
+        Will raise an exception otherwise.
+        """
+        await self.fetch()
+
+    async def delete(self):
+        exc.default.check_response(await self._client.DELETE(self._url))
+
+
+class AsyncFileOrFolder(_AsyncResource):
+    """Things that are common to both files and folders."""
+    _url_template = resources.FileOrFolder._url_template
+    _lazy_attributes = resources.FileOrFolder._lazy_attributes
+
+    async def _action(self, action, destination):
+        exc.default.check_response(await self._client.POST(self._url, dict(action=action, destination=destination)))
+        return self.__class__(self._client, path=destination)
+
+    async def copy(self, destination):
+        """Copy this to another path. Destination path should have all segments (including the last one)."""
+        return await self._action('copy', destination)
+
+    async def move(self, destination):
+        """Move this to another path. Destination path should have all segments (including the last one)."""
+        return await self._action('move', destination)
+
+    async def _get(self):
+        """Get the right object type (File or Folder), depending on what this path points to in the Cloud File System"""
+        json = exc.default.check_json_response(await self._client.GET(self._url))
+        if json['is_folder'] and not isinstance(self, AsyncFolder):
+            instance = AsyncFolder(self._client, path=self.path)
+        elif not json['is_folder'] and not isinstance(self, AsyncFile):
+            instance = AsyncFile(self._client, path=self.path)
+        else:
+            instance = self
+        instance._update_attributes(json)
+        if instance.is_folder:
+            instance.folders = [AsyncFolder(self._client, **folder_data) for folder_data in json.get('folders', ())]
+            instance.files = [AsyncFile(self._client, **file_data) for file_data in json.get('files', ())]
+        return instance
+
+
+class AsyncFile(AsyncFileOrFolder):
+    """
+    Wrapper for a file in the cloud.
+    Does not have to exist - this can represent a new file to be uploaded.
+    """
+    _upload_chunk_size = resources.File._upload_chunk_size
+    _upload_retries = resources.File._upload_retries
+    _lazy_attributes = resources.File._lazy_attributes
+    _url_template_content = resources.File._url_template_content
+    _url_template_content_chunked = resources.File._url_template_content_chunked
+
+    async def upload(self, fp, progress_callback=None):
+        """
+        Upload file contents.
+        fp can be bytes, a string, any file-like object, an iterable of bytes or an asynchronous iterable of bytes
+        (like an async generator or aiohttp's StreamReader). It is read one chunk at a time.
+        Blocking reads from file-like objects and checksums of chunks are done in the default executor.
+        Progress callback is optional - if provided, it should match signature of ProgressCallbacks.upload_progress
+        (size passed to it will be None).
+        """
+        if isinstance(fp, bytes):
+            fp = [fp]
+        elif isinstance(fp, str):
+            fp = [fp.encode('utf-8')]
+        chunks = _split_into_chunks(fp, self._upload_chunk_size)
+        data = await _next(chunks, b'')
+        following = await _next(chunks)
+        if following is None and len(data) < self._upload_chunk_size:
+            url = self._client.get_url(self._url_template_content, path=self.path)
+            await self._send(url, data, {}, 'X-Sha512-Checksum', "Failed to upload file", {})
+            return
+        url = self._client.get_url(self._url_template_content_chunked, path=self.path)
+        headers = {}
+        chunk_number = 1
+        uploaded = 0
+        while True:
+            headers['x-egnyte-chunk-num'] = "%d" % chunk_number
+            if following is None:
+                headers['x-egnyte-last-chunk'] = "true"
+            r = await self._send(url, data, headers, 'x-egnyte-chunk-sha512-checksum', "Failed to upload file chunk",
+                                 {"chunk_number": chunk_number, "start_position": uploaded})
+            if chunk_number == 1:
+                headers['x-egnyte-upload-id'] = r.headers['x-egnyte-upload-id']
+            uploaded += len(data)
+            if progress_callback is not None:
+                progress_callback(self, None, uploaded)
+            if following is None:
+                break
+            data, following = following, await _next(chunks)
+            chunk_number += 1
+
+    async def _send(self, url, data, headers, checksum_header, error_message, error_details):
+        """Send upload request, retrying if checksums don't match."""
+        our_sha = await asyncio.get_event_loop().run_in_executor(None, _sha512, data)
+        retries = max(self._upload_retries, 1)
+        while retries > 0:
+            r = exc.default.check_response(await self._client.POST(url, data=data, headers=dict(headers, **{'content-length': str(len(data))})))
+            if r.headers[checksum_header] == our_sha:
+                return r
+            retries -= 1
+        raise exc.ChecksumError(error_message, error_details)
+
+    async def download(self, download_range=None):
+        """
+        Download file contents.
+        Returns an AsyncFileDownload.
+        Optional range is 2 integer sequence (start offset, end offset) used to download only part of the file.
+        End offset can be None to download everything after start offset.
+        """
+        url = self._client.get_url(self._url_template_content, path=self.path)
+        if download_range is None:
+            r = await _check_stream(exc.default, await self._client.GET(url, stream=True))
+        else:
+            if len(download_range) != 2:
+                raise exc.InvalidParameters('Download range needs to be None or a 2 element integer sequence')
+            start, end = download_range
+            range_header = 'bytes=%d-' % start if end is None else 'bytes=%d-%d' % (start, end)
+            r = await _check_stream(exc.partial, await self._client.GET(url, stream=True, headers={'Range': range_header}))
+        return AsyncFileDownload(r, self)
+
+    async def save_to(self, path, progress_callback=None):
+        """
+        Download file contents to a local file.
+        Progress callback is optional - if provided, it should match signature of ProgressCallbacks.download_progress
+        """
+        await (await self.download()).save_to(path, progress_callback)
+
+
+class AsyncFolder(AsyncFileOrFolder):
+    """
+    Wrapper for a folder the cloud.
+    Does not have to exist - can represent a new folder yet to be created.
+    """
+    _lazy_attributes = resources.Folder._lazy_attributes
+    folders = None
+    files = None
+
+    def folder(self, path, **kwargs):
+        """Return a subfolder of this folder."""
+        return AsyncFolder(self._client, path=self.path + '/' + path, **kwargs)
+
+    def file(self, filename, **kwargs):
+        """Return a file in this folder."""
+        return AsyncFile(self._client, folder=self, filename=filename, path=self.path + '/' + filename, **kwargs)
+
+    async def create(self, ignore_if_exists=True):
+        """
+        Create a new folder in the Egnyte cloud.
+        If ignore_if_exists is True, error raised if folder already exists will be ignored.
+        """
+        r = await self._client.POST(self._url, dict(action='add_folder'))
+        (exc.created_ignore_existing if ignore_if_exists else exc.created).check_response(r)
+        return self
+
+    async def list(self):
+        """
+        Gets contents of this folder (in instance attributes 'folders' and 'files')
+        """
+        return await self._get()
+
+
+class AsyncPaginator(base.Paginator):
+    """Same as base.Paginator, but fetch_page is a coroutine function and this is an asynchronous iterator."""
+
+    def __iter__(self):
+        raise TypeError("Use 'async for' to iterate over %s" % self.__class__.__name__)
+
+    def stream(self, jobs=4):
+        raise TypeError("Use 'async for' to iterate over %s" % self.__class__.__name__)
+
+    async def __aiter__(self):
+        offset = self.offset
+        count = self._count(offset)
+        page = await self.fetch_page(offset, count) if count else ()
+        while count:
+            next_offset = offset + min(len(page), count)
+            next_count = self._count(next_offset) if self._has_more(page, offset, count) else 0
+            next_page = None
+            if next_count and self.prefetch:
+                next_page = asyncio.ensure_future(self.fetch_page(next_offset, next_count))
+            try:
+                for item in page[:count]:
+                    yield item
+            except BaseException:
+                if next_page is not None:
+                    next_page.cancel()
+                raise
+            offset, count = next_offset, next_count
+            if count:
+                page = await next_page if next_page is not None else await self.fetch_page(offset, count)
+
+
+class AsyncSearch(resources.Search):
+    """Search API. Same parameters as Search, but files is a coroutine and paginate returns an AsyncPaginator."""
+
+    async def _files(self, url, params):
+        json = exc.default.check_json_response(await self._client.POST(url, json=params))
+        return self._results(json)
+
+    def paginate(self, page_size=100, limit=None, prefetch=True, **kwargs):
+        """
+        Iterate over all search results (same keyword arguments as files), fetching page_size results at a time (max 100).
+        Returns an AsyncPaginator of SearchMatch objects, with up to 'limit' results. Use 'async for' to iterate over it.
+        """
+        return AsyncPaginator(lambda offset, count: self.files(offset=offset, count=count, **kwargs), min(page_size, 100), limit,
+                              prefetch=prefetch)
+
+
+class AsyncEvents(_AsyncResource, events.Events):
+    """
+    Events. Same as Events, but list and poll are coroutines, and this is an asynchronous iterator.
+    Use 'await fetch()' to get latest_event_id and other attributes.
+    """
+
+    async def _list(self, url, params, start_id):
+        json = exc.no_content_ok.check_json_response(await self._client.GET(url, params=params))
+        return self._results(json, start_id)
+
+    async def poll(self, count=None):
+        """
+        List events starting with latest_event_id, if any found, update start_id and return them.
+        """
+        if self.start_id is None:
+            await self.fetch()
+            self.start_id = self.latest_event_id
+        results = await self.list(self.start_id, count)
+        if results:
+            last = results[-1]
+            self.start_id = last.id
+            self.timestamp = last.timestamp
+        return results
+
+    def __iter__(self):
+        raise TypeError("Use 'async for' to iterate over %s" % self.__class__.__name__)
+
+    async def __aiter__(self):
+        """Never ending generator of events. Will wait if necessary"""
+        while True:
+            results = await self.poll()
+            for x in results:
+                yield x
+            if not results:
+                await asyncio.sleep(self.poll_delay)
+
+
+class AsyncAuditReport(_AsyncResource):
+    _url_template = audits.AuditReport._url_template
+    _url_template_completed = audits.AuditReport._url_template_completed
+    status = 'running'
+
+    async def is_ready(self):
+        """
+        True if report is ready to be downloaded.
+        Does a single API request.
+        """
+        r = await self._client.GET(self._url)
+        if r.status_code == 303:
+            self.status = 'completed'
+            return True
+        exc.default.check_response(r)
+        return False
+
+    async def wait(self, check_time=5.0):
+        """Wait until report is ready."""
+        while not await self.is_ready():
+            await asyncio.sleep(check_time)
+
+    def complete_url(self):
+        return self._client.get_url(self._url_template_completed, type=self.type, id=self.id)
+
+    async def download(self):
+        r = await _check_stream(exc.default, await self._client.GET(self.complete_url(), stream=True))
+        return AsyncFileDownload(r, None)
+
+    async def json(self):
+        return exc.default.check_json_response(await self._client.GET(self.complete_url()))
+
+
+class AsyncAudits(audits.Audits):
+    """Audit reports API. Same parameters as Audits, but all methods generating reports are coroutines."""
+
+    async def _create(self, type, json, format):
+        url = self._client.get_url(self._url_template, type=type)
+        r = await self._client.POST(url, json)
+        return AsyncAuditReport(self._client, id=self._job_id(r), format=format, type=type)
+
+    def get(self, id):
+        """Get a previously generated report by its id"""
+        return AsyncAuditReport(self._client, id=id)
+
+
+class AsyncEgnyteClient(AsyncSession):
+    """Main client object for use with asyncio. Should be closed with 'await client.close()'."""
+
+    @property
+    def user_info(self):
+        """
+        Information about user associated with this API access token (awaitable).
+        """
+        return self._user_info()
+
+    async def _user_info(self):
+        return exc.default.check_json_response(await self.GET(self.get_url("pubapi/v1/userinfo")))
+
+    @property
+    def audits(self):
+        """API for Audit Reports"""
+        return AsyncAudits(self)
+
+    @property
+    def search(self):
+        """API for Search"""
+        return AsyncSearch(self)
+
+    @property
+    def events(self):
+        """API for events"""
+        return AsyncEvents(self)
+
+    def folder(self, path="/Shared", **kwargs):
+        """Get an AsyncFolder object for the specified path"""
+        return AsyncFolder(self, path=path.rstrip('/'), **kwargs)
+
+    def file(self, path, **kwargs):
+        """Get an AsyncFile object for the specified path"""
+        return AsyncFile(self, path=path, **kwargs)
+
+    async def get(self, path):
+        """Check whether a path is a file or a folder and return the right object."""
+        return await self.folder(path)._get()
+
+    def impersonate(self, username):
+        """
+        Start impersonating another user.
+
+        * username: either username or full email address of user to impersonate.
+        """
+        self._headers['X-Egnyte-Act-As-Email' if '@' in username else 'X-Egnyte-Act-As'] = username
+
+    def stop_impersonating(self):
+        """
+        Stop impersonating another user.
+        """
+        self._headers.pop('X-Egnyte-Act-As', None)
+        self._headers.pop('X-Egnyte-Act-As-Email', None)
@@ -31,9 +31,7 @@ class Audits(base.HasClient):
             json['access_points'] = list(access_points)
         if users:
             json['users'] = list(users)
-        url = self._client.get_url(self._url_template, type="logins")
-        r = self._client.POST(url, json)
-        return AuditReport(self._client, id=self._job_id(r), format=format, type='logins')
+        return self._create("logins", json, format)
 
     def files(self, format, date_start, date_end, folders=None, file=None, users=None, transaction_type=None):
         """
@@ -57,9 +55,7 @@ class Audits(base.HasClient):
             json['users'] = list(users)
         if transaction_type:
             json['transaction_type'] = list(transaction_type)
-        url = self._client.get_url(self._url_template, type="files")
-        r = self._client.POST(url, json)
-        return AuditReport(self._client, id=self._job_id(r), format=format, type='files')
+        return self._create("files", json, format)
 
     def permissions(self, format, date_start, date_end, folders, assigners, assignee_users, assignee_groups):
         """
@@ -79,9 +75,12 @@ class Audits(base.HasClient):
                     assigners=list(assigners),
                     assignee_users=list(assignee_users),
                     assignee_groups=list(assignee_groups))
-        url = self._client.get_url(self._url_template, type="permissions")
+        return self._create("permissions", json, format)
+
+    def _create(self, type, json, format):
+        url = self._client.get_url(self._url_template, type=type)
         r = self._client.POST(url, json)
-        return AuditReport(self._client, id=self._job_id(r), format=format, type='permissions')
+        return AuditReport(self._client, id=self._job_id(r), format=format, type=type)
 
     def get(self, id):
         """Get a previously generated report by its id"""
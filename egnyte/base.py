@@ -1,111 +1,730 @@
 from __future__ import print_function, unicode_literals
 
+import collections
 import datetime
+import email.utils
 import fnmatch
+import functools
 import hashlib
 import json
 import os
 import os.path
+import random
 import re
+import socket
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from urllib.parse import quote
 
 import requests
+import urllib3
+import urllib3.connection
+import urllib3.connectionpool
+import urllib3.exceptions
 
 from egnyte import exc, configuration
+from egnyte.metrics import Metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 
 JSON_HEADERS = {'content-type': 'application/json'}
 DEFAULT_TIMEOUT = 30
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+
+
+class RateLimiter(object):
+    """
+    Token bucket limiting the rate of API requests. Safe to use from many threads.
+
+    * rate - number of requests per second
+    * burst - number of requests that can be sent at once after a period of inactivity
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token from the bucket.
+        Returns number of seconds caller has to wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(-self._tokens / self.rate, 0.0)
+
+    def acquire(self):
+        """Wait until a request can be sent. Returns time spent waiting."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def set_rate(self, rate):
+        """Change number of requests per second."""
+        with self._lock:
+            self.rate = float(rate)
+
+    def over_quota(self):
+        """Called when API responds that requests are sent too fast."""
+
+    def succeeded(self):
+        """Called when API accepts a request."""
+
+
+class AdaptiveRateLimiter(object):
+    """
+    Adjusts the rate of another RateLimiter using AIMD (additive increase, multiplicative decrease).
+    Rate is multiplied by 'decrease' when API responds that requests are sent too fast (at most once per 'cooldown' seconds),
+    and grows by 'increase' requests per second after 'successes' successful requests in a row, up to 'max_rate'.
+    Current number of requests per second is available as 'rate' attribute.
+    """
+    cooldown = 1.0
+
+    def __init__(self, limiter, max_rate=None, min_rate=0.1, increase=0.1, decrease=0.5, successes=20):
+        self.limiter = limiter
+        self.max_rate = float(max_rate or limiter.rate)
+        self.min_rate = float(min_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.successes = successes
+        self._successes = 0
+        self._decreased = None
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        return self.limiter.rate
+
+    def reserve(self):
+        return self.limiter.reserve()
+
+    def acquire(self):
+        return self.limiter.acquire()
+
+    def over_quota(self):
+        with self._lock:
+            self._successes = 0
+            now = time.monotonic()
+            if self._decreased is not None and now - self._decreased < self.cooldown:
+                return
+            self._decreased = now
+            self.limiter.set_rate(max(self.min_rate, self.rate * self.decrease))
+
+    def succeeded(self):
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self.successes:
+                self._successes = 0
+                if self.rate < self.max_rate:
+                    self.limiter.set_rate(min(self.max_rate, self.rate + self.increase))
+
+
+class FileRateLimiter(RateLimiter):
+    """
+    Token bucket kept in a local file, which limits the rate of API requests of all processes using the same file.
+
+    * path - path of the file (it will be created if it doesn't exist)
+    * rate - number of requests per second
+    * burst - number of requests that can be sent at once after a period of inactivity
+    """
+
+    def __init__(self, path, rate, burst=1):
+        super(FileRateLimiter, self).__init__(rate, burst)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, 0o700, exist_ok=True)
+
+    def reserve(self):
+        """
+        Take a token from the bucket shared with other processes.
+        Returns number of seconds caller has to wait before sending the request.
+        """
+        with self._lock, os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600), "r+b") as fp:
+            _lock_file(fp)
+            try:
+                now = time.time()
+                try:
+                    tokens, updated = (float(x) for x in fp.read().split())
+                except ValueError:
+                    tokens, updated = self.burst, now
+                tokens = min(self.burst, tokens + max(now - updated, 0.0) * self.rate) - 1
+                fp.seek(0)
+                fp.truncate()
+                fp.write(("%r %r" % (tokens, now)).encode('ascii'))
+                fp.flush()
+            finally:
+                _unlock_file(fp)
+        return max(-tokens / self.rate, 0.0)
+
+
+def _lock_file(fp):
+    """Wait for an exclusive lock on an open file."""
+    if fcntl is not None:
+        fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+    else:
+        while True:
+            try:
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                pass
+
+
+def _unlock_file(fp):
+    if fcntl is not None:
+        fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+    else:
+        fp.seek(0)
+        msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(config):
+    """
+    Get a RateLimiter according to 'requests_per_second' (or 'time_between_requests') and 'burst' config keys.
+    Returns None if there is no limit.
+    If 'rate_limiter' config key is "file", limits are shared with other processes through a file
+    ('rate_limiter_path' config key, by default a file in ~/.egnyte named after the API key).
+    If 'adaptive_rate_limit' config key is true, rate is lowered when API responds that the quota is exceeded
+    and raised back up to 'requests_per_second' (default: 2) after a series of successful requests,
+    but not below 'min_requests_per_second'.
+    Limiter is shared by all sessions using the same API key (or access token, if there is no API key),
+    the first configuration to use it decides the limits.
+    """
+    adaptive = config.get('adaptive_rate_limit', False)
+    if config.get('time_between_requests'):
+        rate = 1.0 / float(config['time_between_requests'])
+    elif config.get('requests_per_second'):
+        rate = float(config['requests_per_second'])
+    elif adaptive:
+        rate = DEFAULT_REQUESTS_PER_SECOND
+    else:
+        return None
+    burst = config.get('burst', 1)
+    kind = config.get('rate_limiter', 'local')
+    if kind not in ('local', 'file'):
+        raise exc.InvalidParameters("Unknown rate_limiter: %s" % kind)
+    key = config.get('api_key') or config.get('access_token')
+    if kind == 'file':
+        path = config.get('rate_limiter_path')
+        if path is None:
+            path = 'ratelimit-%s' % hashlib.sha1((key or '').encode('utf-8')).hexdigest()[:16]
+        path = configuration.add_directory(path)
+        key = (kind, path)
+
+    def create():
+        limiter = FileRateLimiter(path, rate, burst) if kind == 'file' else RateLimiter(rate, burst)
+        if adaptive:
+            limiter = AdaptiveRateLimiter(limiter, min_rate=config.get('min_requests_per_second', 0.1))
+        return limiter
+
+    if key is None:
+        return create()
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = create()
+        return _rate_limiters[key]
+
+
+class RetryPolicy(object):
+    """
+    Decides if and when failed requests are repeated. Used by a single session.
+
+    * retries - how many times a request is repeated after connection errors or responses with one of 'statuses'
+    * backoff, max_backoff - n-th retry waits a random time between 0 and backoff * 2 ** (n - 1) seconds,
+      but not more than max_backoff (or longer, if server sends Retry-After header)
+    * budget - each retry costs 1 from the budget, each successful request adds budget_ratio to it (up to budget).
+      Requests are not repeated when it runs out, so retries can't multiply the load on a struggling server.
+    * over_quota_retries - how many times a request rejected because of exceeded API quota is repeated
+
+    Numbers of retries are counted in 'counters' (keys: 'retries', 'over_quota', 'budget_exhausted').
+    """
+    statuses = (429, 502, 503, 504)
+
+    def __init__(self, retries=3, backoff=1.0, max_backoff=30.0, budget=10, budget_ratio=0.1, over_quota_retries=10):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = float(budget)
+        self.budget_ratio = budget_ratio
+        self.over_quota_retries = over_quota_retries
+        self.counters = collections.Counter()
+        self._budget = self.budget
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Create a policy according to 'retries', 'retry_backoff', 'retry_max_backoff', 'retry_budget'
+        and 'over_quota_retries' config keys.
+        """
+        return cls(retries=config.get('retries', 3),
+                   backoff=config.get('retry_backoff', 1.0),
+                   max_backoff=config.get('retry_max_backoff', 30.0),
+                   budget=config.get('retry_budget', 10),
+                   over_quota_retries=config.get('over_quota_retries', 10))
+
+    def retry_delay(self, attempt, response=None):
+        """
+        Decide whether a request that failed 'attempt' times in a row should be repeated.
+        Returns number of seconds to wait before repeating it, or None if it should not be repeated.
+        Response is None if the request failed because of connection error.
+        """
+        if attempt > self.retries:
+            return None
+        with self._lock:
+            if self._budget < 1:
+                self.counters['budget_exhausted'] += 1
+                return None
+            self._budget -= 1
+            self.counters['retries'] += 1
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        return max(delay, _retry_after(response, 0.0))
+
+    def over_quota_delay(self, attempt, response):
+        """
+        Decide whether a request rejected because of exceeded quota 'attempt' times should be repeated.
+        Returns number of seconds to wait before repeating it, or None if it should not be repeated.
+        """
+        if attempt > self.over_quota_retries:
+            return None
+        with self._lock:
+            self.counters['over_quota'] += 1
+        return _retry_after(response, 1.0)
+
+    def succeeded(self):
+        """Called after a request succeeds (or fails in a way that is not retried)."""
+        with self._lock:
+            self._budget = min(self.budget, self._budget + self.budget_ratio)
+
+
+def _retry_after(response, default):
+    """Number of seconds from Retry-After header of the response."""
+    value = response.headers.get('retry-after') if response is not None else None
+    if value is None:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        date = parse_last_modified(value)
+        return max(date - time.time(), 0.0) if date is not None else default
+
+
+def _rewinder(data):
+    """Returns a function that resets request body before it's sent again, or None if it can't be sent again."""
+    if data is None or isinstance(data, (bytes, str, dict, list, tuple)):
+        return lambda: None
+    if hasattr(data, 'rewind'):
+        return data.rewind
+    if is_seekable(data):
+        position = data.tell()
+        return lambda: data.seek(position)
+    return None
+
+
+class MetadataCache(object):
+    """
+    Cache of API responses with metadata of files and folders, keyed by URL. Safe to use from many threads.
+    Entries expire after 'ttl' seconds, least recently used entries are removed when there are more than 'size'.
+    """
+
+    def __init__(self, ttl=60.0, size=1000):
+        self.ttl = ttl
+        self.size = size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """Get cached value, or None if it's missing or expired."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[url]
+                return None
+            self._entries.move_to_end(url)
+            return value
+
+    def put(self, url, value):
+        with self._lock:
+            self._entries[url] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url, prefix=False):
+        """Remove cached value for the URL (and all URLs starting with it, if prefix is True)."""
+        with self._lock:
+            if prefix:
+                for key in [key for key in self._entries if key.startswith(url)]:
+                    del self._entries[key]
+            else:
+                self._entries.pop(url, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _URL(str):
+    """URL that remembers the template it was made from, so requests can be grouped by endpoint."""
+    template = None
+
+
+def _body_size(data, headers):
+    """Size of request body in bytes (0 if unknown)."""
+    if data is None:
+        return 0
+    if isinstance(data, bytes):
+        return len(data)
+    if isinstance(data, str):
+        return len(data.encode('utf-8'))
+    if hasattr(data, 'size'):
+        return data.size
+    for key, value in (headers or {}).items():
+        if key.lower() == 'content-length':
+            return int(value)
+    return 0
+
+
+_connection_timings = threading.local()
+
+
+class _TimedConnectionMixin(object):
+    """
+    Measures how long DNS lookup, TCP connect and TLS handshake of a new connection take,
+    if the current thread asked for it by setting _connection_timings.current to a dictionary.
+    """
+
+    def _new_conn(self):
+        timings = getattr(_connection_timings, 'current', None)
+        if timings is None:
+            return super(_TimedConnectionMixin, self)._new_conn()
+        host = self._dns_host
+        start = time.time()
+        try:
+            addresses = []
+            for info in socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM):
+                if info[4][0] not in addresses:
+                    addresses.append(info[4][0])
+        except socket.gaierror:
+            addresses = [host]  # let urllib3 report the error
+        resolved = time.time()
+        timings['dns'] = resolved - start
+        error = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super(_TimedConnectionMixin, self)._new_conn()
+                    break
+                except (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError) as e:
+                    error = e
+            else:
+                raise error
+        finally:
+            self._dns_host = host
+        timings['connect'] = time.time() - resolved
+        return sock
+
+    def connect(self):
+        timings = getattr(_connection_timings, 'current', None)
+        if timings is None:
+            return super(_TimedConnectionMixin, self).connect()
+        start = time.time()
+        super(_TimedConnectionMixin, self).connect()
+        if isinstance(self, urllib3.connection.HTTPSConnection):
+            timings['tls'] = max(time.time() - start - timings.get('dns', 0.0) - timings.get('connect', 0.0), 0.0)
+
+
+class _HTTPConnection(_TimedConnectionMixin, urllib3.connection.HTTPConnection):
+    pass
+
+
+class _HTTPSConnection(_TimedConnectionMixin, urllib3.connection.HTTPSConnection):
+    pass
+
+
+class _ResizablePoolMixin(object):
+
+    def grow(self, maxsize):
+        """Let the pool keep up to maxsize connections. Connections in use are not affected."""
+        queue = self.pool
+        if queue is None:  # pool is closed
+            return
+        with queue.mutex:
+            if maxsize > queue.maxsize:
+                # empty slots go to the bottom of the stack, so idle connections are still reused first
+                queue.queue[0:0] = [None] * (maxsize - queue.maxsize)
+                queue.maxsize = maxsize
+                queue.not_empty.notify_all()
+
+
+class _HTTPConnectionPool(_ResizablePoolMixin, urllib3.connectionpool.HTTPConnectionPool):
+    ConnectionCls = _HTTPConnection
+
+
+class _HTTPSConnectionPool(_ResizablePoolMixin, urllib3.connectionpool.HTTPSConnectionPool):
+    ConnectionCls = _HTTPSConnection
+
+
+class _HTTPAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter that sets socket options on new connections and can measure how long connecting takes."""
+
+    def __init__(self, socket_options=None, **kwargs):
+        self.socket_options = socket_options
+        super(_HTTPAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs['socket_options'] = self.socket_options
+        super(_HTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': self._pool_class(_HTTPConnectionPool),
+                                                   'https': self._pool_class(_HTTPSConnectionPool)}
+
+    def _pool_class(self, cls):
+        """
+        Pools are created with current _pool_maxsize. It is not changed in the pool manager's configuration,
+        because it is a part of the key pools are found by.
+        """
+        def new_pool(host, port=None, **kwargs):
+            kwargs['maxsize'] = max(kwargs.get('maxsize', 1), self._pool_maxsize)
+            return cls(host, port, **kwargs)
+        return new_pool
+
+    def proxy_manager_for(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs['socket_options'] = self.socket_options
+        return super(_HTTPAdapter, self).proxy_manager_for(*args, **kwargs)
+
+    def grow(self, maxsize):
+        """Let connection pools keep up to maxsize connections, without replacing them."""
+        self._pool_maxsize = maxsize
+        for manager in [self.poolmanager] + list(self.proxy_manager.values()):
+            for key in manager.pools.keys():
+                pool = manager.pools.get(key)
+                if isinstance(pool, _ResizablePoolMixin):
+                    pool.grow(maxsize)
+
+
+def get_socket_options(config):
+    """
+    Socket options for connections according to 'tcp_nodelay' (default: true)
+    and 'tcp_keepalive' (seconds of inactivity before keep-alive probes are sent, or true for system default) config keys.
+    """
+    options = []
+    if config.get('tcp_nodelay', True):
+        options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+    keepalive = config.get('tcp_keepalive')
+    if keepalive:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        if keepalive is not True:
+            for name in ('TCP_KEEPIDLE', 'TCP_KEEPINTVL'):
+                if hasattr(socket, name):
+                    options.append((socket.IPPROTO_TCP, getattr(socket, name), int(keepalive)))
+    return options
 
 
 class Session(object):
     """
-    Provides persistent HTTPS connections to the Egnyte API
+    Provides persistent HTTPS connections to the Egnyte API.
+    Optional rate_limiter and retry_policy override the ones created according to the config.
+    Optional metrics (egnyte.metrics.Metrics) collects statistics of requests, it is created if 'metrics' config key is true.
+    If 'metadata_cache' config key is true, metadata of files and folders is cached for 'metadata_cache_ttl' seconds
+    (default: 60), up to 'metadata_cache_size' entries (default: 1000).
+    Connection pool is configured by 'pool_connections', 'pool_maxsize' (default: 10), 'pool_block' (default: false),
+    'keep_alive' (default: true), 'tcp_nodelay' and 'tcp_keepalive' config keys.
     """
-    time_between_requests = None
-    last_request_time = None
 
-    def __init__(self, config=None):
+    def __init__(self, config=None, rate_limiter=None, retry_policy=None, metrics=None):
         self.config = config if isinstance(config, dict) else configuration.load(config)
-        domain = self.config['domain']
-        if '.' not in domain:
-            domain += ".egnyte.com"
-        self._url_prefix = "https://%s/" % domain
+        self._url_prefix = get_url_prefix(self.config)
         self._session = requests.Session()
         if 'access_token' in self.config:
             self._session.headers['Authorization'] = 'Bearer %s' % self.config['access_token']
-        if 'time_between_requests' in self.config:
-            self.time_between_requests = config['time_between_requests']
-        elif 'requests_per_second' in self.config:
-            self.time_between_requests = 1.0 / float(self.config['requests_per_second'])
+        if not self.config.get('keep_alive', True):
+            self._session.headers['Connection'] = 'close'
+        self._pool_lock = threading.Lock()
+        self._pool_maxsize = int(self.config.get('pool_maxsize', requests.adapters.DEFAULT_POOLSIZE))
+        self._mount_adapter()
+        self.rate_limiter = rate_limiter or get_rate_limiter(self.config)
+        self.retry_policy = retry_policy or RetryPolicy.from_config(self.config)
+        if metrics is None and self.config.get('metrics'):
+            metrics = Metrics()
+        self.metrics = metrics
+        self._hooks = []
+        self.metadata_cache = None
+        if self.config.get('metadata_cache'):
+            self.metadata_cache = MetadataCache(self.config.get('metadata_cache_ttl', 60.0), self.config.get('metadata_cache_size', 1000))
+
+    def _mount_adapter(self):
+        adapter = _HTTPAdapter(socket_options=get_socket_options(self.config),
+                               pool_connections=int(self.config.get('pool_connections', requests.adapters.DEFAULT_POOLSIZE)),
+                               pool_maxsize=self._pool_maxsize,
+                               pool_block=bool(self.config.get('pool_block', False)))
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._adapter = adapter
+
+    def ensure_pool_size(self, size):
+        """
+        Make sure the connection pool can keep at least 'size' connections,
+        so that many threads can send requests without reconnecting.
+        Pools are enlarged in place, so it is safe to call while other threads are sending requests.
+        """
+        with self._pool_lock:
+            if size > self._pool_maxsize:
+                self._pool_maxsize = size
+                self._adapter.grow(size)
 
     def _respect_limits(self):
-        if self.time_between_requests:
-            if self.last_request_time is not None:
-                since = time.time() - self.last_request_time
-                if since < self.time_between_requests:
-                    time.sleep(self.time_between_requests - since)
-            self.last_request_time = time.time()
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.acquire()
+            if delay and self.metrics is not None:
+                self.metrics.rate_limited(delay)
+
+    def add_hook(self, hooks):
+        """Register egnyte.tracing.RequestHooks called before and after every API request."""
+        self._hooks = self._hooks + [hooks]
 
-    def _retry(self, func, *args, **kwargs):
+    def remove_hook(self, hooks):
+        self._hooks = [h for h in self._hooks if h is not hooks]
 
+    def _request(self, method, url, **kwargs):
+        """Send a request, retrying according to retry_policy."""
+        self._respect_limits()
         kwargs["timeout"] = int(self.config.get("timeout")) if self.config.get(
             "timeout") is not None else DEFAULT_TIMEOUT
-        
-        retries = 3
-        while retries > 0:
+        template = getattr(url, 'template', url)
+        sent = _body_size(kwargs.get('data'), kwargs.get('headers'))
+        rewind = _rewinder(kwargs.get('data'))
+        attempt = over_quota = 0
+        while True:
+            info = self._before_request(method, url, template, kwargs.get('params'), attempt + over_quota)
+            response = error = delay = None
+            start = time.time()
             try:
-                response = func(*args, **kwargs)
+                response = self._session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+                attempt += 1
+                delay = self.retry_policy.retry_delay(attempt) if rewind is not None else None
+            else:
                 if response.headers.get('x-mashery-error-code') == 'ERR_403_DEVELOPER_OVER_QPS':
-                    retry_after = float(response.headers.get('retry-after', '1'))
-                    time.sleep(retry_after)
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.over_quota()
+                    over_quota += 1
+                    delay = self.retry_policy.over_quota_delay(over_quota, response) if rewind is not None else None
+                elif response.status_code in self.retry_policy.statuses:
+                    attempt += 1
+                    delay = self.retry_policy.retry_delay(attempt, response) if rewind is not None else None
                 else:
-                    return response
-            except (requests.ConnectionError, requests.Timeout):
-                retries -= 1
-                if retries == 0:
-                    raise 
-                time.sleep(1)
-
-    def GET(self, url, **kwargs):
-        self._respect_limits()
-        return self._retry(self._session.get, url, allow_redirects=False, **kwargs)
-
-    def POST(self, url, json_data=None, **kwargs):
-        self._respect_limits()
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.succeeded()
+                    self.retry_policy.succeeded()
+            finally:
+                timings = getattr(_connection_timings, 'current', None)
+                _connection_timings.current = None
+            self._after_request(info, method, template, start, response, error, delay, kwargs.get('stream'), sent, timings)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            if self.metrics is not None:
+                self.metrics.retry(method, template, delay)
+            time.sleep(delay)
+            rewind()
+            self._respect_limits()
+
+    def _before_request(self, method, url, template, params, attempt):
+        """Call hooks before a request is sent, start measuring connection timings if there are any."""
+        if not self._hooks:
+            return None
+        info = dict(method=method, url=str(url), template=template, params=params, attempt=attempt, timestamp=time.time())
+        for hooks in self._hooks:
+            hooks.before_request(info)
+        _connection_timings.current = {}
+        return info
+
+    def _after_request(self, info, method, template, start, response, error, delay, stream, sent, timings):
+        """Update metrics and call hooks after a request."""
+        duration = time.time() - start
+        status = response.status_code if response is not None else None
+        if self.metrics is not None:
+            if response is None:
+                received = 0
+            else:
+                received = int(response.headers.get('content-length', 0)) if stream else len(response.content)
+            self.metrics.request(method, template, status, duration, sent, received)
+        if info is not None:
+            timings = timings or {}
+            info.update(status=status, error=repr(error) if error is not None else None, retry_delay=delay,
+                        timings=dict(dns=timings.get('dns'), connect=timings.get('connect'), tls=timings.get('tls'),
+                                     ttfb=response.elapsed.total_seconds() if response is not None else None,
+                                     total=duration))
+            for hooks in self._hooks:
+                hooks.after_request(info)
+
+    @staticmethod
+    def _body(json_data, kwargs):
+        """Get request body and headers for the data (or json_data, if given)."""
         if json_data is None:
             headers = {}
             data = kwargs.pop('data', None)
         else:
-            headers = JSON_HEADERS
+            headers = dict(JSON_HEADERS)
             data = json.dumps(json_data)
         if 'headers' in kwargs:
             headers.update(kwargs.pop('headers'))
-        return self._retry(self._session.post, url, data=data, headers=headers, **kwargs)
+        return data, headers
+
+    def GET(self, url, **kwargs):
+        return self._request('GET', url, allow_redirects=False, **kwargs)
+
+    def POST(self, url, json_data=None, **kwargs):
+        data, headers = self._body(json_data, kwargs)
+        return self._request('POST', url, data=data, headers=headers, **kwargs)
 
     def PATCH(self, url, json_data=None, **kwargs):
-        self._respect_limits()
-        if json_data is None:
-            headers = {}
-            data = kwargs.pop('data', None)
-        else:
-            headers = JSON_HEADERS
-            data = json.dumps(json_data)
-        if 'headers' in kwargs:
-            headers.update(kwargs.pop('headers'))
-        return self._retry(self._session.patch, url, data=data, headers=headers, **kwargs)
+        data, headers = self._body(json_data, kwargs)
+        return self._request('PATCH', url, data=data, headers=headers, **kwargs)
 
     def DELETE(self, url, **kwargs):
-        self._respect_limits()
-        return self._retry(self._session.delete, url, **kwargs)
+        return self._request('DELETE', url, **kwargs)
 
     def get_url(self, _path, **kwargs):
         if kwargs:
-            kw = {k: encode_path(v) if isinstance(v, str) else str(v) for k, v in kwargs.items()}
-            return self._url_prefix + _path % kw
+            url = _URL(self._url_prefix + _path % _URLArguments(kwargs))
         else:
-            return self._url_prefix + _path
+            url = _URL(self._url_prefix + _path)
+        url.template = _path
+        return url
 
     def close(self):
         if hasattr(self, '_session'):
@@ -113,6 +732,14 @@ class Session(object):
             del self._session
 
 
+def get_url_prefix(config):
+    """Get URL of the API for the domain from config"""
+    domain = config['domain']
+    if '.' not in domain:
+        domain += ".egnyte.com"
+    return "https://%s/" % domain
+
+
 class HasClient(object):
     """Base class for API wrappers and utils"""
 
@@ -122,16 +749,36 @@ class HasClient(object):
         self.__dict__.update(kwargs)
 
 
+class _URLArguments(object):
+    """Mapping for URL templates, encoding only the values the template uses."""
+
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+    def __getitem__(self, key):
+        value = self.kwargs[key]
+        return encode_path(value) if isinstance(value, str) else str(value)
+
+
+class _LazyURL(object):
+    """Resource URL, made from its _url_template on first use and then stored in the instance."""
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        url = instance.__dict__['_url'] = instance._client.get_url(instance._url_template, **instance.__dict__)
+        return url
+
+
 class Resource(object):
     """Base wrapper for API resources (singular objects with specific URL)"""
     _lazy_attributes = ()
     _url_template = ""  # Whatever this depends on should not be in _lazy_attributes
+    _url = _LazyURL()
 
     def __init__(self, _client, **kwargs):
         self._client = _client
         self.__dict__.update(kwargs)
-        if '_url' not in kwargs:
-            self._url = self._client.get_url(self._url_template, **kwargs)
 
     def __getattr__(self, name):
         """If attribute is in _lazyAtrributes but we don't have it's value yet, fetch attributes from service."""
@@ -190,42 +837,198 @@ def get_access_token(config):
 
 
 class _FileChunk(object):
-    """Wrapper for chunk of the file that also calculates SHA512 checksum while file is read"""
+    """
+    Wrapper for chunk of the file that also calculates SHA512 checksum while file is read.
+    If lock is given, every read seeks to the right position first while holding it,
+    so chunks of the same file can be read concurrently.
+    """
 
-    def __init__(self, fp, start, size):
+    def __init__(self, fp, start, size, lock=None):
         self.fp = fp
         self.position = start
         self.left = self.size = size
+        self.lock = lock
         self.sha = hashlib.sha512()
 
     def read(self, size=None):
         if size is None or size > self.left:
             size = self.left
-        result = self.fp.read(size)
+        if self.lock is None:
+            result = self.fp.read(size)
+        else:
+            with self.lock:
+                self.fp.seek(self.position + self.size - self.left)
+                result = self.fp.read(size)
         self.sha.update(result)
         self.left -= len(result)
         return result
 
     def rewind(self):
-        self.fp.seek(self.position)
+        if self.lock is None:
+            self.fp.seek(self.position)
+        # with a lock, read seeks to the right position anyway, and seeking here could move other chunks' reads
         self.left = self.size
         self.sha = hashlib.sha512()
 
+    def hexdigest(self):
+        """Read the whole chunk to calculate its SHA512 checksum, then rewind it."""
+        while self.read(1024 * 1024):
+            pass
+        result = self.sha.hexdigest()
+        self.rewind()
+        return result
+
+
+class UploadJournal(object):
+    """
+    Records progress of a chunked upload in a small JSON file, so it can be resumed later.
+    Contains upload id, chunk size and SHA512 checksums of chunks already sent.
 
-def split_file_into_chunks(fp, file_size, chunk_size):
+    * path: Path of the journal file.
+    * source: JSON serializable description of the uploaded file. Journal saved for a different source is ignored.
+    """
+
+    def __init__(self, path, source=None):
+        self.path = path
+        self.source = source
+        self.upload_id = None
+        self.chunk_size = None
+        self.chunks = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def for_file(cls, local_path, cloud_path, directory=None):
+        """
+        Get a journal for uploading a local file to a cloud path.
+        Journals are kept in ~/.egnyte/uploads by default.
+        Journal is ignored if size or modification time of the local file has changed.
+        """
+        local_path = os.path.abspath(local_path)
+        stat = os.stat(local_path)
+        name = hashlib.sha1(("%s\n%s" % (local_path, cloud_path)).encode('utf-8')).hexdigest()
+        path = os.path.join(directory or configuration.add_directory('uploads'), name + '.json')
+        return cls(path, dict(local_path=local_path, cloud_path=cloud_path, size=stat.st_size, mtime=stat.st_mtime))
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            return
+        if data.get('source') == self.source:
+            self.upload_id = data['upload_id']
+            self.chunk_size = data['chunk_size']
+            self.chunks = {int(k): v for (k, v) in data['chunks'].items()}
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, 0o700)
+        data = dict(source=self.source, upload_id=self.upload_id, chunk_size=self.chunk_size, chunks=self.chunks)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+    def start(self, upload_id, chunk_size):
+        """Record a new upload, forgetting previous one."""
+        with self._lock:
+            self.upload_id = upload_id
+            self.chunk_size = chunk_size
+            self.chunks = {}
+
+    def chunk_done(self, chunk_number, checksum):
+        """Record a chunk that was sent successfully."""
+        with self._lock:
+            self.chunks[chunk_number] = checksum
+            self.save()
+
+    def is_done(self, chunk_number, chunk):
+        """Check if this chunk was sent already and has not changed since."""
+        return chunk_number in self.chunks and self.chunks[chunk_number] == chunk.hexdigest()
+
+    def clear(self):
+        """Forget the upload and remove the journal file."""
+        with self._lock:
+            self.upload_id = self.chunk_size = None
+            self.chunks = {}
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+def split_file_into_chunks(fp, file_size, chunk_size, lock=None):
     """
     Split file-like object into sequence of file-like objects, each of
     those with size no greater than chunk_size bytes.
     Those are just wrappers to the original file-like objects. They should be fully
     read sequentially, and they cannot be used concurrently with
-    the original object.
+    the original object - unless a lock is given, in which case original object must
+    support seek and chunks can be read from different threads.
     """
     position = 0
     while position < file_size:
-        yield _FileChunk(fp, position, min(chunk_size, file_size - position))
+        yield _FileChunk(fp, position, min(chunk_size, file_size - position), lock)
         position += chunk_size
 
 
+def _read_blocks(fp, block_size):
+    """Read blocks from a file-like object until end of file, which is b'' or '' for text streams."""
+    while True:
+        block = fp.read(block_size)
+        if not block:
+            break
+        yield block
+
+
+def split_stream_into_chunks(source, chunk_size, block_size=1024 * 1024):
+    """
+    Split a stream into sequence of file-like objects, each of those with size of chunk_size bytes,
+    except the last one, which may be smaller.
+    Source can be a file-like object that cannot seek (like a pipe or a socket) or an iterable of bytes.
+    It is read only once, and only as far as needed to fill in the next chunk.
+    Each chunk is held in memory, so it can be rewound.
+    """
+    if hasattr(source, 'read'):
+        blocks = _read_blocks(source, block_size)
+    else:
+        blocks = iter(source)
+    buffer = bytearray()
+    for block in blocks:
+        if isinstance(block, str):
+            block = block.encode('utf-8')
+        buffer += block
+        while len(buffer) >= chunk_size:
+            yield _FileChunk(BytesIO(bytes(memoryview(buffer)[:chunk_size])), 0, chunk_size)
+            del buffer[:chunk_size]
+    if buffer:
+        yield _FileChunk(BytesIO(bytes(buffer)), 0, len(buffer))
+
+
+def mark_last(iterable):
+    """
+    Generate (item, is_last) tuples for each item of the iterable.
+    This reads one item ahead, so at most 2 items are held at a time.
+    """
+    iterator = iter(iterable)
+    try:
+        current = next(iterator)
+    except StopIteration:
+        return
+    for following in iterator:
+        yield current, False
+        current = following
+    yield current, True
+
+
+def is_seekable(fp):
+    """Check if file-like object supports seek and tell."""
+    if not (hasattr(fp, 'seek') and hasattr(fp, 'tell')):
+        return False
+    seekable = getattr(fp, 'seekable', None)
+    return seekable is None or seekable()
+
+
 def get_file_size(fp):
     """Get size of the file or length of a bytes object"""
     fp.seek(0, 2)  # move the current position to the end of the file
@@ -234,12 +1037,74 @@ def get_file_size(fp):
     return size
 
 
+def get_file_checksum(path):
+    """Calculate SHA512 checksum of a local file"""
+    sha = hashlib.sha512()
+    with open(path, "rb") as fp:
+        for data in iter(lambda: fp.read(1024 * 1024), b''):
+            sha.update(data)
+    return sha.hexdigest()
+
+
+class HashCache(object):
+    """
+    Cache of SHA512 checksums of local files, kept in a JSON file, so files that have not changed
+    (have the same size and modification time) do not have to be read again.
+    By default it's kept in ~/.egnyte/checksums.json. Call save after checksums are calculated.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or configuration.add_directory('checksums.json')
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._changed = False
+        try:
+            with open(self.path, "r") as f:
+                self._entries = json.load(f)
+        except (IOError, ValueError):
+            pass
+
+    def checksum(self, path):
+        """Get SHA512 checksum of a local file, calculating it only if file has changed since last time."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime]:
+            return entry[2]
+        checksum = get_file_checksum(path)
+        with self._lock:
+            self._entries[path] = [stat.st_size, stat.st_mtime, checksum]
+            self._changed = True
+        return checksum
+
+    def save(self):
+        with self._lock:
+            if not self._changed:
+                return
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, 0o700)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.path)
+            self._changed = False
+
+
 def date_format(date):
     if isinstance(date, (datetime.datetime, datetime.date)):
         return date.strftime("%Y-%m-%d")
     else:
         return date
 
+def parse_last_modified(value):
+    """Convert last_modified attribute of a file (RFC 1123 date) to a timestamp. Returns None if it can't be parsed."""
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
 def date_in_ms(date):
     if isinstance(date, (datetime.datetime, datetime.date)):
         return int(date.strftime("%s")) * 1000
@@ -258,10 +1123,19 @@ def date_in_ms(date):
 
 def encode_path(path):
     if isinstance(path, str):
+        # Listings make paths with the same parent over and over, so encoded parents are remembered
+        parent, slash, name = path.rpartition('/')
+        if slash:
+            return _encode_parent(parent) + '/' + quote(name.encode('utf-8'), b'/')
         path = path.encode('utf-8')
     return quote(path, b'/')
 
 
+@functools.lru_cache(maxsize=1024)
+def _encode_parent(path):
+    return quote(path.encode('utf-8'), b'/')
+
+
 class FileDownload(object):
     """
     Provides the file length and other metadata.
@@ -272,6 +1146,8 @@ class FileDownload(object):
         self.response = response
         self.file = file
         self.closed = False
+        content_range = re.match(r'bytes (\d+)-', response.headers.get('content-range', ''))
+        self.offset = int(content_range.group(1)) if content_range else 0
 
     def __len__(self):
         return int(self.response.headers['content-length'])
@@ -281,7 +1157,7 @@ class FileDownload(object):
         Copy data to a file, then close the source.
         Optional progress_callback should have the signature of ProgressCallbacks.download_progress
         """
-        downloaded = 0
+        downloaded = self.offset
         with self:
             for chunk in self.iter_content():
                 fp.write(chunk)
@@ -289,12 +1165,14 @@ class FileDownload(object):
                     downloaded += len(chunk)
                     progress_callback(self.file, self.file.size, downloaded)
 
-    def save_to(self, path, progress_callback=None):
+    def save_to(self, path, progress_callback=None, resume=False):
         """
         Create a new file and save the contents
+        If resume is True, contents are appended to the existing file instead - this should be used
+        with a download that starts where the local file ends (see File.save_to).
         Optional progress_callback should have the signature of ProgressCallbacks.download_progress
         """
-        with open(path, "wb") as fp:
+        with open(path, "ab" if resume else "wb") as fp:
             self.write_to(fp, progress_callback)
 
     def close(self):
@@ -375,11 +1253,129 @@ class ResultList(list):
     List with additional attributes representing a partial list of objects that exist in the cloud.
     total_count: Count of all objects that exist.
     offset: Starting index of this slice of results.
+    has_more: True if API reported there are more results after this slice.
+    Use Paginator to iterate over all objects.
     """
-    # TODO: make this more lazy?
 
     def __init__(self, data, total_count, offset, has_more=False):
         super(ResultList, self).__init__(data)
         self.total_count = total_count
         self.offset = offset
         self.has_more = has_more
+
+
+class Paginator(object):
+    """
+    Iterable over all objects of a paginated list, fetched lazily one page at a time.
+    While objects of one page are consumed, the next page is fetched in the background (unless prefetch is False).
+    Stops at total_count of the pages, or when a page doesn't report has_more and is shorter than requested.
+
+    * fetch_page - function taking offset (starting with 0) and count, returning a ResultList
+    * page_size - number of objects requested at once
+    * limit - maximum number of objects (None for all of them)
+    * offset - index of the first object
+    * client - client whose connection pool is enlarged to fit concurrent requests of stream and fetch_all
+    """
+
+    def __init__(self, fetch_page, page_size=100, limit=None, offset=0, prefetch=True, client=None):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.limit = limit
+        self.offset = offset
+        self.prefetch = prefetch
+        self.client = client
+
+    def _count(self, offset):
+        """Number of objects to request in a page starting at offset (0 if limit is reached)."""
+        if self.limit is None:
+            return self.page_size
+        return max(0, min(self.page_size, self.offset + self.limit - offset))
+
+    @staticmethod
+    def _has_more(page, offset, count):
+        if not page:
+            return False
+        if page.has_more:
+            return True
+        total_count = Paginator._total_count(page)
+        if total_count is not None:
+            return offset + len(page) < total_count
+        return len(page) >= count
+
+    @staticmethod
+    def _total_count(page):
+        if isinstance(page.total_count, int) and not isinstance(page.total_count, bool) and page.total_count >= 0:
+            return page.total_count
+
+    def __iter__(self):
+        count = self._count(self.offset)
+        if count:
+            for item in self._serial(self.offset, count, self.fetch_page(self.offset, count)):
+                yield item
+
+    def _serial(self, offset, count, page):
+        """Yields objects of page and of the pages after it, fetching them one at a time."""
+        executor = ThreadPoolExecutor(1) if self.prefetch else None
+        try:
+            while count:
+                next_offset = offset + min(len(page), count)
+                next_count = self._count(next_offset) if self._has_more(page, offset, count) else 0
+                next_page = None
+                if next_count and executor is not None:
+                    next_page = executor.submit(self.fetch_page, next_offset, next_count)
+                for item in page[:count]:
+                    yield item
+                offset, count = next_offset, next_count
+                if count:
+                    page = next_page.result() if next_page is not None else self.fetch_page(offset, count)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def stream(self, jobs=4):
+        """
+        Iterate over all objects, in order. After the first page, if it reports total_count,
+        up to 'jobs' of the remaining pages are fetched at the same time (requests still respect the rate limit).
+        Otherwise pages are fetched one at a time, like when iterating the Paginator.
+        """
+        count = self._count(self.offset)
+        if not count:
+            return
+        page = self.fetch_page(self.offset, count)
+        total_count = self._total_count(page)
+        if total_count is None or not page:
+            for item in self._serial(self.offset, count, page):
+                yield item
+            return
+        # API can return less than requested, so the rest is requested in pages of the size it actually returned
+        step = min(len(page), count)
+        end = total_count if self.limit is None else min(total_count, self.offset + self.limit)
+        for item in page[:count]:
+            yield item
+        offsets = iter(range(self.offset + step, end, step))
+        pending = collections.deque()
+        if self.client is not None:
+            self.client.ensure_pool_size(jobs)
+        with ThreadPoolExecutor(jobs) as executor:
+            def submit():
+                offset = next(offsets, None)
+                if offset is not None:
+                    pending.append(executor.submit(self.fetch_page, offset, min(step, end - offset)))
+
+            for _ in range(jobs):
+                submit()
+            try:
+                while pending:
+                    page = pending.popleft().result()
+                    submit()
+                    for item in page[:step]:
+                        yield item
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def fetch_all(self, jobs=4):
+        """
+        Returns list of all objects, fetching pages after the first one in parallel (see stream).
+        """
+        return list(self.stream(jobs))
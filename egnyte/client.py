@@ -4,6 +4,9 @@ import collections
 import os
 import os.path
 import shutil
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from queue import Empty, Queue
 
 from egnyte import exc, base, resources, audits, events
 
@@ -99,13 +102,22 @@ class EgnyteClient(base.Session):
         self._session.headers.pop('X-Egnyte-Act-As', None)
         self._session.headers.pop('X-Egnyte-Act-As-Email', None)
 
-    def bulk_upload(self, paths, target, exclude=None, progress_callbacks=None):
+    def bulk_upload(self, paths, target, exclude=None, progress_callbacks=None, resume=False, jobs=1,
+                    skip_unchanged=False, hash_cache=None):
         """
         Transfer many files or directories to Cloud File System.
 
         * paths - list of local file paths
         * target - Path in CFS to upload to
         * progress_callbacks - Callback object (see ProgressCallbacks)
+        * resume - if True, large files will be uploaded using upload journals (see base.UploadJournal),
+          so interrupted uploads can be continued by running the same bulk upload again
+        * jobs - number of files to upload concurrently. Directories are always created before their contents.
+          If more than 1, progress callbacks are called from different threads, but never at the same time.
+        * skip_unchanged - if True, files that already exist in the cloud with the same size and checksum
+          are not uploaded again. Cloud folders are listed once to get checksums of their files.
+        * hash_cache - base.HashCache used to avoid calculating checksums of unchanged local files again
+          when skip_unchanged is True. Default is the one in ~/.egnyte/checksums.json
         """
         if not paths:
             return
@@ -114,72 +126,174 @@ class EgnyteClient(base.Session):
         target_folder = self.folder(target)
         progress_callbacks.creating_directory(target_folder)
         target_folder.create(True)
-        for is_dir, local_path, cloud_path in base.generate_paths(paths, exclude):
-            if is_dir:
-                cloud_dir = target_folder.folder(cloud_path)
-                progress_callbacks.creating_directory(cloud_dir)
-                cloud_dir.create(True)
-            else:
-                size = os.path.getsize(local_path)
-                if size:  # empty files cannot be uploaded
-                    cloud_file = target_folder.file(cloud_path, size=size)
-                    with open(local_path, "rb") as fp:
-                        progress_callbacks.upload_start(local_path, cloud_file, size)
-                        cloud_file.upload(fp, size, progress_callbacks.upload_progress)
-                    progress_callbacks.upload_finish(cloud_file)
+        if jobs > 1:
+            progress_callbacks = _SynchronizedCallbacks(progress_callbacks)
+        cloud_files = None
+        if skip_unchanged:
+            cloud_files = _CloudFiles(self)
+            if hash_cache is None:
+                hash_cache = base.HashCache()
+        self.ensure_pool_size(jobs)
+        try:
+            with _TaskPool(jobs) as pool:
+                for is_dir, local_path, cloud_path in base.generate_paths(paths, exclude):
+                    if is_dir:
+                        cloud_dir = target_folder.folder(cloud_path)
+                        progress_callbacks.creating_directory(cloud_dir)
+                        cloud_dir.create(True)
+                    else:
+                        pool.submit(self._upload_file, local_path, target_folder, cloud_path, progress_callbacks, resume,
+                                    cloud_files, hash_cache)
+        finally:
+            if hash_cache is not None:
+                hash_cache.save()
         progress_callbacks.finished()
 
-    def _bulk_download(self, items, root_path, local_dir, overwrite, progress_callbacks):
+    def _upload_file(self, local_path, target_folder, cloud_path, progress_callbacks, resume, cloud_files=None, hash_cache=None):
+        size = os.path.getsize(local_path)
+        if size:  # empty files cannot be uploaded
+            cloud_file = target_folder.file(cloud_path, size=size)
+            if cloud_files is not None:
+                existing = cloud_files.get(cloud_file.path)
+                if existing is not None and existing.size == size and existing.checksum == hash_cache.checksum(local_path):
+                    progress_callbacks.skipped(cloud_file, "File is unchanged")
+                    return
+            journal = base.UploadJournal.for_file(local_path, cloud_file.path) if resume else None
+            with open(local_path, "rb") as fp:
+                progress_callbacks.upload_start(local_path, cloud_file, size)
+                cloud_file.upload(fp, size, progress_callbacks.upload_progress, journal=journal)
+            progress_callbacks.upload_finish(cloud_file)
+
+    def _bulk_download(self, items, root_path, local_dir, overwrite, progress_callbacks, resume=False, jobs=1, sync=False):
+        """
+        Folders are listed in breadth-first order.
+        If jobs is more than 1, up to 'jobs' folders are listed and up to 'jobs' files are downloaded
+        at the same time, using separate thread pools.
+        Local directories are created only by the calling thread.
+        """
         root_len = len(root_path.rstrip('/')) + 1
         queue = collections.deque(items)
-        while True:
-            try:
-                obj = queue.popleft()
-            except IndexError:
-                break
-            relpath = obj.path[root_len:].strip('/')
-            local_path = os.path.join(local_dir, relpath.replace('/', os.sep))
-            dir_path = os.path.dirname(local_path)
-            if not os.path.isdir(dir_path):
-                if os.path.exists(dir_path):
-                    if overwrite:
-                        os.unlink(local_path)
+        listed = Queue()  # folders listed by the listing pool
+        listing = set()
+        lister = ThreadPoolExecutor(jobs) if jobs > 1 else None
+        self.ensure_pool_size(2 * jobs)  # listing and downloads
+        try:
+            with _TaskPool(jobs) as downloads:
+                while queue or listing:
+                    try:
+                        folder, future = listed.get(block=not queue)
+                    except Empty:
+                        pass
                     else:
-                        progress_callbacks.skipped(obj, "Existing file conflicts with cloud folder")
+                        listing.remove(future)
+                        future.result()
+                        queue.extend(folder.files)
+                        queue.extend(folder.folders)
                         continue
-                os.makedirs(dir_path)
-            if obj.is_folder:
-                # schedule contents for later, files first
-                if obj.files is None:
-                    progress_callbacks.getting_info(obj.path)
-                    obj.list()
-                    progress_callbacks.got_info(obj)
-                queue.extend(obj.files)
-                queue.extend(obj.folders)
-            else:
-                if os.path.exists(local_path):
-                    if overwrite:
-                        if os.path.isdir(local_path) and not os.path.islink(local_path):
-                            shutil.rmtree(local_path)
-                        else:
-                            os.unlink(local_path)
-                    else:
-                        progress_callbacks.skipped(obj, "Existing file conflicts with cloud file")
+                    obj = queue.popleft()
+                    local_path = self._bulk_download_path(obj, root_len, local_dir, overwrite, progress_callbacks)
+                    if local_path is None:
                         continue
-                progress_callbacks.download_start(local_path, obj, obj.size)
-                obj.download().save_to(local_path, progress_callbacks.download_progress)
-                progress_callbacks.download_finish(obj)
-
-    def bulk_download(self, paths, local_dir, overwrite=False, progress_callbacks=None):
+                    if obj.is_folder:
+                        # schedule contents for later, files first
+                        if obj.files is None:
+                            if lister is not None:
+                                future = lister.submit(self._list_folder, obj, progress_callbacks)
+                                future.add_done_callback(lambda future, folder=obj: listed.put((folder, future)))
+                                listing.add(future)
+                                continue
+                            self._list_folder(obj, progress_callbacks)
+                        queue.extend(obj.files)
+                        queue.extend(obj.folders)
+                    else:
+                        downloads.submit(self._download_file, obj, local_path, overwrite, progress_callbacks, resume, sync)
+        finally:
+            if lister is not None:
+                for future in listing:
+                    future.cancel()
+                lister.shutdown()
+
+    def _bulk_download_path(self, obj, root_len, local_dir, overwrite, progress_callbacks):
+        """Get local path for a cloud object and create its parent directory. Returns None if object should be skipped."""
+        relpath = obj.path[root_len:].strip('/')
+        local_path = os.path.join(local_dir, relpath.replace('/', os.sep))
+        dir_path = os.path.dirname(local_path)
+        if not os.path.isdir(dir_path):
+            if os.path.exists(dir_path):
+                if overwrite:
+                    os.unlink(dir_path)
+                else:
+                    progress_callbacks.skipped(obj, "Existing file conflicts with cloud folder")
+                    return None
+            os.makedirs(dir_path)
+        return local_path
+
+    def _list_folder(self, folder, progress_callbacks):
+        progress_callbacks.getting_info(folder.path)
+        folder.list()
+        progress_callbacks.got_info(folder)
+
+    def _download_file(self, obj, local_path, overwrite, progress_callbacks, resume, sync=False):
+        if sync and os.path.isfile(local_path) and self._is_unchanged(obj, local_path):
+            progress_callbacks.skipped(obj, "File is unchanged")
+            return
+        if resume and os.path.isfile(local_path):
+            pass  # existing file is the beginning of this file, download the rest
+        elif os.path.exists(local_path):
+            if overwrite or (sync and os.path.isfile(local_path)):
+                if os.path.isdir(local_path) and not os.path.islink(local_path):
+                    shutil.rmtree(local_path)
+                else:
+                    os.unlink(local_path)
+            else:
+                progress_callbacks.skipped(obj, "Existing file conflicts with cloud file")
+                return
+        progress_callbacks.download_start(local_path, obj, obj.size)
+        obj.save_to(local_path, progress_callbacks.download_progress, resume=resume)
+        if sync:
+            last_modified = base.parse_last_modified(obj.last_modified)
+            if last_modified is not None:
+                os.utime(local_path, (last_modified, last_modified))
+        progress_callbacks.download_finish(obj)
+
+    def _is_unchanged(self, obj, local_path):
+        """
+        Check if local file is the same as the cloud file.
+        Files with different sizes are different, files with same size and modification time are the same,
+        otherwise checksum of the local file is compared. Modification time of the same files is updated.
+        """
+        stat = os.stat(local_path)
+        if stat.st_size != obj.size:
+            return False
+        last_modified = base.parse_last_modified(obj.last_modified)
+        if last_modified is not None and int(stat.st_mtime) == int(last_modified):
+            return True
+        if base.get_file_checksum(local_path) != obj.checksum:
+            return False
+        if last_modified is not None:
+            os.utime(local_path, (stat.st_atime, last_modified))
+        return True
+
+    def bulk_download(self, paths, local_dir, overwrite=False, progress_callbacks=None, resume=False, jobs=1, sync=False):
         """
         Transfer many files or directories to Cloud File System.
 
         * paths - list of local file paths
         * target - Path in CFS to upload to
         * progress_callbacks - Callback object (see ProgressCallbacks)
+        * resume - if True, existing local files are treated as interrupted downloads: only the missing part
+          is downloaded, and result is verified against cloud checksum (see File.save_to)
+        * jobs - number of folders to list and number of files to download concurrently.
+          If more than 1, progress callbacks are called from different threads, but never at the same time.
+        * sync - if True, existing local files that are the same as cloud files are skipped, and those that
+          are different are replaced. Size and modification time from folder listing are compared first, local
+          files are read to compare checksums only if that is not enough. Modification time of downloaded files
+          is set to match the cloud, so next sync does not have to read them.
         """
         if progress_callbacks is None:
             progress_callbacks = ProgressCallbacks()
+        if jobs > 1:
+            progress_callbacks = _SynchronizedCallbacks(progress_callbacks)
         for path in paths:
             progress_callbacks.getting_info(path)
             obj = self.get(path)
@@ -189,7 +303,7 @@ class EgnyteClient(base.Session):
                 items = obj.files + obj.folders
             else:
                 items = (obj,)
-            self._bulk_download(items, root_path, local_dir, overwrite, progress_callbacks)
+            self._bulk_download(items, root_path, local_dir, overwrite, progress_callbacks, resume, jobs, sync)
         progress_callbacks.finished()
 
 
@@ -231,3 +345,80 @@ class ProgressCallbacks(object):
 
     def skipped(self, cloud_obj, reason):
         """Object has been skipped because of 'reason'"""
+
+
+class _CloudFiles(object):
+    """Files that exist in the cloud, each folder is listed only once, when first file in it is needed."""
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+        self._folders = {}
+
+    def get(self, path):
+        """Get File object with metadata for a cloud path, or None if it doesn't exist."""
+        folder_path, name = path.rsplit('/', 1)
+        with self._lock:
+            folder = self._folders.setdefault(folder_path, [threading.Lock(), None])
+        with folder[0]:
+            if folder[1] is None:
+                try:
+                    folder[1] = {f.name: f for f in self._client.folder(folder_path).list().files}
+                except exc.NotFound:
+                    folder[1] = {}
+        return folder[1].get(name)
+
+
+class _SynchronizedCallbacks(object):
+    """Wrapper for progress callbacks that makes sure they are never called from two threads at the same time."""
+
+    def __init__(self, callbacks):
+        self._callbacks = callbacks
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        callback = getattr(self._callbacks, name)
+
+        def synchronized(*args, **kwargs):
+            with self._lock:
+                return callback(*args, **kwargs)
+        return synchronized
+
+
+class _TaskPool(object):
+    """
+    Runs tasks in a pool of threads, limiting number of queued tasks to twice the number of threads.
+    Errors raised by tasks are raised again from submit or on exit, remaining tasks are then cancelled.
+    With just one job, tasks are executed immediately in the calling thread.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.executor = ThreadPoolExecutor(jobs) if jobs > 1 else None
+        self.pending = set()
+
+    def submit(self, func, *args):
+        if self.executor is None:
+            return func(*args)
+        while len(self.pending) >= 2 * self.jobs:
+            self.wait(FIRST_COMPLETED)
+        self.pending.add(self.executor.submit(func, *args))
+
+    def wait(self, return_when):
+        done, self.pending = wait(self.pending, return_when=return_when)
+        for future in done:
+            future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.executor is None:
+            return
+        try:
+            while self.pending and exc_type is None:
+                self.wait(FIRST_COMPLETED)
+        finally:
+            for future in self.pending:
+                future.cancel()
+            self.executor.shutdown()
@@ -1,5 +1,8 @@
+import threading
 import time
 
+import requests
+
 from egnyte import base, exc, resources
 
 
@@ -100,7 +103,13 @@ class Events(base.Resource):
             start_id = self.start_id
         params = base.filter_none_values(dict(id=start_id, suppress=self.suppress, type=self.types, count=count, folder=self.folder))
         url = self._client.get_url(self._url_template_list)
+        return self._list(url, params, start_id)
+
+    def _list(self, url, params, start_id):
         json = exc.no_content_ok.check_json_response(self._client.GET(url, params=params))
+        return self._results(json, start_id)
+
+    def _results(self, json, start_id):
         if json is None:
             return ()
         else:
@@ -127,3 +136,72 @@ class Events(base.Resource):
                 yield x
             if not results:
                 time.sleep(self.poll_delay)
+
+
+class CacheInvalidator(object):
+    """
+    Keeps metadata cache of the client consistent with changes made by others, by following events in a background thread.
+    Cached metadata of target_path and source_path of every file_system event is removed
+    (together with everything inside them and their parent folder listings).
+    Use as a context manager, or call start() and stop().
+
+    * folder - follow only events in this folder (and cache only needs to be consistent inside it)
+    * poll_delay - seconds to wait before polling again when there are no new events
+    """
+
+    def __init__(self, client, folder=None, poll_delay=None):
+        self._client = client
+        self.events = client.events.filter(folder=folder)
+        if poll_delay is not None:
+            self.events.poll_delay = poll_delay
+        self.error = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start following events from the current cursor. Entries cached before are removed."""
+        self.events._fetch_attributes()  # cursor fetched by a previous start would be stale
+        self.events.start_id = self.events.latest_event_id
+        if self._client.metadata_cache is not None:
+            self._client.metadata_cache.clear()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="egnyte-cache-invalidator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop following events and wait until the background thread ends."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                results = self.events.poll()
+            except (exc.EgnyteError, requests.RequestException) as e:
+                # events could be missed, so nothing in the cache can be trusted
+                self.error = e
+                if self._client.metadata_cache is not None:
+                    self._client.metadata_cache.clear()
+                results = ()
+            for event in results:
+                self.invalidate(event)
+            if not results:
+                self._stopped.wait(self.events.poll_delay)
+
+    def invalidate(self, event):
+        """Remove cached metadata of paths changed by the event."""
+        if event.type != 'file_system':
+            return
+        for key in ('source_path', 'target_path'):
+            path = event.data.get(key)
+            if path:
+                resources.FileOrFolder(self._client, path=path)._invalidate()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,160 @@
+"""
+Statistics of API requests.
+
+Pass a Metrics instance to the client (or set "metrics": true in config) to collect them:
+
+    metrics = egnyte.metrics.Metrics()
+    client = egnyte.EgnyteClient(config, metrics=metrics)
+    ...
+    metrics.snapshot()
+    print(metrics.to_prometheus())
+"""
+
+import threading
+
+
+class _Endpoint(object):
+    """Statistics of requests with the same method and URL template."""
+
+    def __init__(self, buckets):
+        self.statuses = {}
+        self.buckets = [0] * len(buckets)
+        self.duration = 0.0
+        self.count = 0
+        self.sent = 0
+        self.received = 0
+        self.retries = 0
+
+
+class Metrics(object):
+    """
+    Collects numbers of requests, latency histograms, bytes sent and received, retries and time spent
+    waiting for the rate limit, per HTTP method and URL template. Safe to use from many threads and sessions.
+
+    * buckets - upper bounds (in seconds) of latency histogram buckets
+    """
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets=None):
+        if buckets is not None:
+            self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.rate_limit_sleep = 0.0
+        self.retry_sleep = 0.0
+
+    def _endpoint(self, method, template):
+        key = (method, template)
+        if key not in self._endpoints:
+            self._endpoints[key] = _Endpoint(self.buckets)
+        return self._endpoints[key]
+
+    def request(self, method, template, status, duration, sent=0, received=0):
+        """
+        Record a single request.
+        Status is None if the request failed because of connection error.
+        """
+        with self._lock:
+            endpoint = self._endpoint(method, template)
+            endpoint.statuses[status] = endpoint.statuses.get(status, 0) + 1
+            endpoint.count += 1
+            endpoint.duration += duration
+            endpoint.sent += sent
+            endpoint.received += received
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    endpoint.buckets[i] += 1
+                    break
+
+    def retry(self, method, template, delay):
+        """Record that a request will be repeated after delay seconds."""
+        with self._lock:
+            self._endpoint(method, template).retries += 1
+            self.retry_sleep += delay
+
+    def rate_limited(self, delay):
+        """Record time spent waiting to respect the rate limit."""
+        with self._lock:
+            self.rate_limit_sleep += delay
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self.rate_limit_sleep = 0.0
+            self.retry_sleep = 0.0
+
+    def snapshot(self):
+        """
+        Returns current statistics as a dictionary:
+
+        * endpoints - list of dictionaries with method, template, count, statuses (count per HTTP status),
+          duration (total seconds), histogram (list of [upper bound, cumulative count] pairs),
+          bytes_sent, bytes_received and retries
+        * rate_limit_sleep - total seconds spent waiting for the rate limit
+        * retry_sleep - total seconds spent waiting before retries
+        """
+        with self._lock:
+            endpoints = []
+            for (method, template), endpoint in sorted(self._endpoints.items(), key=lambda item: (item[0][1], item[0][0])):
+                cumulative = 0
+                histogram = []
+                for bound, count in zip(self.buckets, endpoint.buckets):
+                    cumulative += count
+                    histogram.append([bound, cumulative])
+                histogram.append([float('inf'), endpoint.count])
+                endpoints.append(dict(method=method, template=template, count=endpoint.count,
+                                      statuses=dict(endpoint.statuses), duration=endpoint.duration,
+                                      histogram=histogram, bytes_sent=endpoint.sent,
+                                      bytes_received=endpoint.received, retries=endpoint.retries))
+            return dict(endpoints=endpoints, rate_limit_sleep=self.rate_limit_sleep, retry_sleep=self.retry_sleep)
+
+    def to_prometheus(self, prefix='egnyte'):
+        """Returns current statistics in Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help, samples):
+            lines.append('# HELP %s_%s %s' % (prefix, name, help))
+            lines.append('# TYPE %s_%s %s' % (prefix, name, kind))
+            for suffix, labels, value in samples:
+                lines.append('%s_%s%s%s %s' % (prefix, name, suffix, _labels(labels), _number(value)))
+
+        endpoints = snapshot['endpoints']
+        metric('requests_total', 'counter', 'Number of API requests.',
+               [('', dict(method=e['method'], endpoint=e['template'], status='error' if status is None else status), count)
+                for e in endpoints for status, count in sorted(e['statuses'].items(), key=lambda item: str(item[0]))])
+        samples = []
+        for e in endpoints:
+            labels = dict(method=e['method'], endpoint=e['template'])
+            samples.extend(('_bucket', dict(labels, le=bound), count) for bound, count in e['histogram'])
+            samples.append(('_sum', labels, e['duration']))
+            samples.append(('_count', labels, e['count']))
+        metric('request_duration_seconds', 'histogram', 'Duration of API requests.', samples)
+        metric('request_bytes_sent_total', 'counter', 'Bytes sent in bodies of API requests.',
+               [('', dict(method=e['method'], endpoint=e['template']), e['bytes_sent']) for e in endpoints])
+        metric('response_bytes_received_total', 'counter', 'Bytes received in bodies of API responses.',
+               [('', dict(method=e['method'], endpoint=e['template']), e['bytes_received']) for e in endpoints])
+        metric('retries_total', 'counter', 'Number of repeated API requests.',
+               [('', dict(method=e['method'], endpoint=e['template']), e['retries']) for e in endpoints])
+        metric('rate_limit_sleep_seconds_total', 'counter', 'Time spent waiting for the rate limit.',
+               [('', {}, snapshot['rate_limit_sleep'])])
+        metric('retry_sleep_seconds_total', 'counter', 'Time spent waiting before repeating API requests.',
+               [('', {}, snapshot['retry_sleep'])])
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (key, _escape(_number(value) if isinstance(value, float) else str(value)))
+                             for key, value in sorted(labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
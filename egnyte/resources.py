@@ -1,4 +1,7 @@
 import collections
+import os
+import threading
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 from egnyte import base, exc
 from io import BytesIO
@@ -10,8 +13,37 @@ class FileOrFolder(base.Resource):
 
     def _action(self, action, destination):
         exc.default.check_response(self._client.POST(self._url, dict(action=action, destination=destination)))
+        if action == 'move':
+            self._invalidate()
+        self._invalidate(destination)
         return self.__class__(self._client, path=destination)
 
+    def _metadata(self):
+        """Get metadata of this path from the cloud, or from client's metadata cache."""
+        cache = self._client.metadata_cache
+        json = cache.get(self._url) if cache is not None else None
+        if json is None:
+            json = exc.default.check_json_response(self._client.GET(self._url))
+            if cache is not None:
+                cache.put(self._url, json)
+        return json
+
+    def _invalidate(self, path=None):
+        """Remove cached metadata of this path (or another one), everything inside it and its parent folder."""
+        cache = self._client.metadata_cache
+        if cache is None:
+            return
+        path = self.path if path is None else path
+        url = self._client.get_url(self._url_template, path=path)
+        cache.invalidate(url)
+        cache.invalidate(url + '/', prefix=True)
+        cache.invalidate(self._client.get_url(self._url_template, path=path.rstrip('/').rsplit('/', 1)[0]))
+
+    def _fetch_attributes(self):
+        json = self._metadata()
+        self._update_attributes(json)
+        return json
+
     def copy(self, destination):
         """Copy this to another path. Destination path should have all segments (including the last one)."""
         return self._action('copy', destination)
@@ -46,7 +78,7 @@ class FileOrFolder(base.Resource):
 
     def _get(self):
         """Get the right object type (File or Folder), depending on what this path points to in the Cloud File System"""
-        json = exc.default.check_json_response(self._client.GET(self._url))
+        json = self._metadata()
         if json['is_folder'] and not isinstance(self, Folder):
             instance = Folder(self._client, path=self.path)
         elif not json['is_folder'] and not isinstance(self, File):
@@ -60,6 +92,10 @@ class FileOrFolder(base.Resource):
         return instance
 
 
+class _UploadExpired(Exception):
+    """Server doesn't know the upload id recorded in an upload journal."""
+
+
 class File(FileOrFolder):
     """
     Wrapper for a file in the cloud.
@@ -68,48 +104,76 @@ class File(FileOrFolder):
     """
     _upload_chunk_size = 100 * (1024 * 1024)  # 100 MB
     _upload_retries = 3
+    _upload_jobs = 1
+    _download_chunk_size = 32 * (1024 * 1024)  # 32 MB
+    _download_jobs = 1
     _link_kind = 'file'
     _lazy_attributes = {'num_versions', 'name', 'checksum', 'last_modified', 'entry_id',
                         'uploaded_by', 'size', 'is_folder', 'versions'}
     _url_template_content = "pubapi/v1/fs-content%(path)s"
     _url_template_content_chunked = "pubapi/v1/fs-content-chunked%(path)s"
 
-    def upload(self, fp, size=None, progress_callback=None):
+    def upload(self, fp, size=None, progress_callback=None, jobs=None, journal=None):
         """
         Upload file contents.
-        fp can be any file-like object, but if you don't specify it's size in advance it must support tell and seek methods.
+        fp can be any file-like object. If it doesn't support seek, it is treated as a stream - it can be a pipe,
+        a socket or any other file-like object that cannot seek, or an iterable of bytes.
+        Stream is read only once, one chunk at a time, so it does not need to fit in memory.
         Progress callback is optional - if provided, it should match signature of ProgressCallbacks.upload_progress
+        (size passed to it will be None if uploading a stream of unknown size).
+        jobs is the number of chunks of a large file that will be sent concurrently (default 1).
+        Concurrent chunked upload requires fp to support seek, or needs memory for (jobs + 2) chunks if uploading a stream.
+        journal is an optional base.UploadJournal used to resume interrupted chunked upload of the same file.
+        It requires fp to support seek.
         """
         if isinstance(fp, bytes):
             fp = BytesIO(fp)
         elif isinstance(fp, str):
             fp = BytesIO(fp.encode('utf-8'))
+        jobs = jobs or self._upload_jobs
+        if not base.is_seekable(fp):
+            if journal is not None:
+                raise exc.InvalidParameters("Resumable upload requires a file that supports seek")
+            return self._chunked_upload(base.split_stream_into_chunks(fp, self._upload_chunk_size), size, progress_callback, jobs)
         if size is None:
             size = base.get_file_size(fp)
         if size < self._upload_chunk_size:
             # simple, one request upload
-            retries = max(self._upload_retries, 1)
-            while retries > 0:
-                url = self._client.get_url(self._url_template_content, path=self.path)
-                chunk = base._FileChunk(fp, 0, size)
-                r = self._client.POST(url, data=chunk, headers={'Content-length': str(size)})
-                exc.default.check_response(r)
-                server_sha = r.headers['X-Sha512-Checksum']
-                our_sha = chunk.sha.hexdigest()
-                if server_sha == our_sha:
-                    break
-                retries -= 1
-                # TODO: retry network errors too
-            if retries == 0:
-                raise exc.ChecksumError("Failed to upload file", {})
-        else:  # chunked upload
-            return self._chunked_upload(fp, size, progress_callback)
+            return self._simple_upload(base._FileChunk(fp, 0, size))
+        if journal is not None and journal.chunk_size != self._upload_chunk_size:
+            journal.clear()
+        lock = threading.Lock() if jobs > 1 or journal is not None else None
+        try:
+            return self._chunked_upload(base.split_file_into_chunks(fp, size, self._upload_chunk_size, lock),
+                                        size, progress_callback, jobs, journal)
+        except _UploadExpired:
+            pass
+        # upload id from the journal is no longer valid, start over
+        journal.clear()
+        return self._chunked_upload(base.split_file_into_chunks(fp, size, self._upload_chunk_size, lock),
+                                    size, progress_callback, jobs, journal)
+
+    def _simple_upload(self, chunk):
+        url = self._client.get_url(self._url_template_content, path=self.path)
+        retries = max(self._upload_retries, 1)
+        while retries > 0:
+            r = self._client.POST(url, data=chunk, headers={'Content-length': str(chunk.size)})
+            exc.default.check_response(r)
+            server_sha = r.headers['X-Sha512-Checksum']
+            our_sha = chunk.sha.hexdigest()
+            if server_sha == our_sha:
+                self._invalidate()
+                return
+            retries -= 1
+            chunk.rewind()
+        raise exc.ChecksumError("Failed to upload file", {})
 
     def download(self, download_range=None):
         """
         Download file contents.
         Returns a FileDownload.
         Optional range is 2 integer sequence (start offset, end offset) used to download only part of the file.
+        End offset can be None to download everything after start offset (e.g. to continue interrupted download).
         """
         url = self._client.get_url(self._url_template_content, path=self.path)
         if download_range is None:
@@ -117,40 +181,184 @@ class File(FileOrFolder):
         else:
             if len(download_range) != 2:
                 raise exc.InvalidParameters('Download range needs to be None or a 2 element integer sequence')
-            r = exc.partial.check_response(self._client.GET(url, stream=True, headers={'Range': 'bytes=%d-%d' % download_range}))
+            start, end = download_range
+            range_header = 'bytes=%d-' % start if end is None else 'bytes=%d-%d' % (start, end)
+            r = exc.partial.check_response(self._client.GET(url, stream=True, headers={'Range': range_header}))
         return base.FileDownload(r, self)
 
-    def _chunked_upload(self, fp, size, progress_callback):
+    def save_to(self, path, progress_callback=None, jobs=None, resume=False):
+        """
+        Download file contents to a local file.
+        jobs is the number of concurrent requests used to download a large file (default 1).
+        If more than 1, file is split into ranges, each downloaded with a separate Range request and written
+        at its offset in the local file. Files not larger than a single range are downloaded with one request.
+        If resume is True and local file is shorter than the cloud file, only the missing part is downloaded.
+        Local file is then compared with the cloud checksum, and downloaded again from the start if they differ.
+        Progress callback is optional - if provided, it should match signature of ProgressCallbacks.download_progress
+        """
+        jobs = jobs or self._download_jobs
+        size = self.size
+        offset = 0
+        if resume and os.path.exists(path):
+            offset = os.path.getsize(path)
+            if offset > size:
+                offset = 0
+        if offset < size or offset == 0:
+            self._save_range(path, offset, size, progress_callback, jobs)
+        if resume and base.get_file_checksum(path) != self.checksum:
+            if offset > 0:  # local part was different than the cloud file
+                self._save_range(path, 0, size, progress_callback, jobs)
+                if base.get_file_checksum(path) == self.checksum:
+                    return
+            raise exc.ChecksumError("Downloaded file is different than the cloud file", {"path": path})
+
+    def _save_range(self, path, offset, size, progress_callback, jobs):
+        """Download part of the file starting at offset, replacing everything after offset in the local file."""
+        if jobs <= 1 or size - offset <= self._download_chunk_size:
+            download = self.download((offset, None)) if offset else self.download()
+            return download.save_to(path, progress_callback, resume=offset > 0)
+        ranges = [(start, min(start + self._download_chunk_size, size) - 1) for start in range(offset, size, self._download_chunk_size)]
+        with open(path, "r+b" if offset else "wb") as fp:
+            fp.truncate(size)
+
+        def fetch(download_range):
+            with open(path, "r+b") as fp:
+                fp.seek(download_range[0])
+                self.download(download_range).write_to(fp)
+
+        completed = set()
+        downloaded = offset
+        self._client.ensure_pool_size(min(jobs, len(ranges)))
+        try:
+            with ThreadPoolExecutor(min(jobs, len(ranges))) as executor:
+                futures = {executor.submit(fetch, download_range): download_range for download_range in ranges}
+                try:
+                    # progress callbacks are called from this thread only
+                    for future in as_completed(futures):
+                        future.result()
+                        start, end = futures[future]
+                        completed.add(start)
+                        downloaded += end - start + 1
+                        if progress_callback is not None:
+                            progress_callback(self, size, downloaded)
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        except BaseException:
+            # keep only the part of the file that was downloaded without gaps, so download can be resumed
+            with open(path, "r+b") as fp:
+                fp.truncate(next((start for (start, end) in ranges if start not in completed), size))
+            raise
+
+    def _upload_chunk(self, url, chunk_number, chunk, headers):
+        """Send a single chunk of chunked upload, retrying if checksums don't match. Returns the response."""
+        retries = max(self._upload_retries, 1)
+        while retries > 0:
+            r = exc.default.check_response(self._client.POST(url, data=chunk, headers=headers))
+            server_sha = r.headers['x-egnyte-chunk-sha512-checksum']
+            our_sha = chunk.sha.hexdigest()
+            if server_sha == our_sha:
+                return r
+            retries -= 1
+            chunk.rewind()
+        raise exc.ChecksumError("Failed to upload file chunk", {"chunk_number": chunk_number, "start_position": chunk.position})
+
+    def _chunked_upload(self, chunks, size, progress_callback, jobs=1, journal=None):
+        """
+        Send a sequence of chunks, reading one chunk ahead to find the last one.
+        First chunk is always sent alone, as its response contains the upload id.
+        Last chunk is always sent after all others are done, as it completes the upload.
+        Chunks in between are sent using up to 'jobs' concurrent requests.
+        If there is just one chunk smaller than chunk size, it is sent using simple upload instead.
+        If journal is given, chunks it records as sent are skipped, and newly sent chunks are recorded.
+        """
         url = self._client.get_url(self._url_template_content_chunked, path=self.path)
-        chunks = list(base.split_file_into_chunks(fp, size, self._upload_chunk_size))  # need count of chunks
-        chunk_count = len(chunks)
-        headers = {}
-        for chunk_number, chunk in enumerate(chunks, 1):  # count from 1 not 0
-            headers['x-egnyte-chunk-num'] = "%d" % chunk_number
-            headers['content-length'] = str(chunk.size)
-            if chunk_number == chunk_count:  # last chunk
+        chunks = base.mark_last(enumerate(chunks, 1))  # count from 1 not 0
+        (chunk_number, chunk), is_last = next(chunks, ((1, base._FileChunk(BytesIO(), 0, 0)), True))
+        if is_last and chunk.size < self._upload_chunk_size:
+            return self._simple_upload(chunk)
+        upload_id = None
+        uploaded = 0
+        resumed_id = journal.upload_id if journal is not None else None
+        confirmed = False  # server accepted a chunk with upload id from the journal
+
+        def send(chunk_number, chunk, is_last):
+            nonlocal confirmed
+            headers = {'x-egnyte-chunk-num': "%d" % chunk_number, 'content-length': str(chunk.size)}
+            if upload_id is not None:
+                headers['x-egnyte-upload-id'] = upload_id
+            if is_last:
                 headers['x-egnyte-last-chunk'] = "true"
-            retries = max(self._upload_retries, 1)
-            while retries > 0:
-                r = self._client.POST(url, data=chunk, headers=headers)
-                server_sha = r.headers['x-egnyte-chunk-sha512-checksum']
-                our_sha = chunk.sha.hexdigest()
-                if server_sha == our_sha:
-                    break
-                retries -= 1
-                # TODO: retry network errors too
-                # TODO: refactor common parts of chunked and standard upload
-            if retries == 0:
-                raise exc.ChecksumError("Failed to upload file chunk", {"chunk_number": chunk_number, "start_position": chunk.position})
-            exc.default.check_response(r)
-            if chunk_number == 1:
-                headers['x-egnyte-upload-id'] = r.headers['x-egnyte-upload-id']
+            try:
+                r = self._upload_chunk(url, chunk_number, chunk, headers)
+            except exc.NotFound:
+                if upload_id is not None and upload_id == resumed_id and not confirmed:
+                    raise _UploadExpired()
+                raise
+            confirmed = True
+            if is_last:
+                self._invalidate()
+            if journal is not None and not is_last:
+                if upload_id is None:
+                    journal.start(r.headers['x-egnyte-upload-id'], self._upload_chunk_size)
+                journal.chunk_done(chunk_number, chunk.sha.hexdigest())
+            return r
+
+        def sent(chunk_number, chunk):
+            nonlocal uploaded
+            uploaded += chunk.size
             if progress_callback is not None:
-                progress_callback(self, size, chunk_number * self._upload_chunk_size)
+                progress_callback(self, size, uploaded)
+
+        def skipped(chunk_number, chunk):
+            return journal is not None and journal.upload_id is not None and journal.is_done(chunk_number, chunk)
+
+        if skipped(chunk_number, chunk):
+            upload_id = journal.upload_id
+        else:
+            upload_id = send(chunk_number, chunk, is_last).headers['x-egnyte-upload-id']
+        sent(chunk_number, chunk)
+        if is_last:
+            return
+        if jobs > 1:
+            self._client.ensure_pool_size(jobs)
+            pending = {}
+            with ThreadPoolExecutor(jobs) as executor:
+                try:
+                    # progress callbacks are called from this thread only
+                    for (chunk_number, chunk), is_last in chunks:
+                        if len(pending) >= jobs or is_last:
+                            done, _ = wait(pending, return_when=ALL_COMPLETED if is_last else FIRST_COMPLETED)
+                            for future in done:
+                                future.result()
+                                sent(*pending.pop(future))
+                        if is_last:
+                            break
+                        if skipped(chunk_number, chunk):
+                            sent(chunk_number, chunk)
+                        else:
+                            pending[executor.submit(send, chunk_number, chunk, is_last)] = (chunk_number, chunk)
+                except BaseException:
+                    for future in pending:
+                        future.cancel()
+                    raise
+        else:
+            for (chunk_number, chunk), is_last in chunks:
+                if is_last:
+                    break
+                if not skipped(chunk_number, chunk):
+                    send(chunk_number, chunk, is_last)
+                sent(chunk_number, chunk)
+        send(chunk_number, chunk, is_last)
+        if journal is not None:
+            journal.clear()
+        sent(chunk_number, chunk)
 
     def delete(self):
         """Delete this file."""
         base.Resource.delete(self)
+        self._invalidate()
 
     def add_note(self, message):
         """Add a note to this file. Returns the created Note object."""
@@ -189,11 +397,13 @@ class Folder(FileOrFolder):
         """
         r = self._client.POST(self._url, dict(action='add_folder'))
         (exc.created_ignore_existing if ignore_if_exists else exc.created).check_response(r)
+        self._invalidate()
         return self
 
     def delete(self):
         """Delete this folder in the cloud."""
         base.Resource.delete(self)
+        self._invalidate()
 
     def list(self):
         """
@@ -201,6 +411,35 @@ class Folder(FileOrFolder):
         """
         return self._get()
 
+    def iter_children(self, page_size=1000, prefetch=True):
+        """
+        Iterate over contents of this folder (subfolders first, then files), without keeping it all in memory.
+        Contents are fetched page_size entries at a time. If prefetch is True,
+        next page is fetched in the background while entries of the current one are being processed.
+        Returns a base.Paginator of Folder and File objects.
+        """
+        return base.Paginator(self._list_page, page_size, prefetch=prefetch, client=self._client)
+
+    def iter_entries(self, page_size=1000, prefetch=True):
+        """
+        Like iter_children, but returns compact Entry objects instead of Folder and File objects.
+        Use it to walk or keep in memory very large trees.
+        """
+        return base.Paginator(lambda offset, count: self._list_page(offset, count, Entry), page_size, prefetch=prefetch,
+                              client=self._client)
+
+    def _list_page(self, offset, count, entry_class=None):
+        json = exc.default.check_json_response(self._client.GET(self._url, params=dict(offset=offset, count=count)))
+        if offset == 0:
+            self._update_attributes(json)
+        if entry_class is None:
+            entries = [Folder(self._client, **folder_data) for folder_data in json.get('folders', ())]
+            entries.extend(File(self._client, **file_data) for file_data in json.get('files', ()))
+        else:
+            entries = [entry_class(self._client, data) for data in json.get('folders', ())]
+            entries.extend(entry_class(self._client, data) for data in json.get('files', ()))
+        return base.ResultList(entries, json.get('total_count'), offset)
+
     def get_permissions(self, users=None, groups=None):
         """
         Get Permission values for this folder.
@@ -238,6 +477,32 @@ class Folder(FileOrFolder):
         return self._client.notes.list(folder=self.path, **kwargs)
 
 
+class Entry(object):
+    """
+    Compact, read-only description of a file or folder from a folder listing.
+    Uses much less memory than File and Folder objects. Attributes that were not in the listing are None.
+
+    * path, name, is_folder
+    * folder_id - for folders
+    * size, checksum, last_modified, entry_id, num_versions, uploaded_by - for files
+    """
+    __slots__ = ('_client', 'path', 'name', 'is_folder', 'folder_id', 'size', 'checksum', 'last_modified',
+                 'entry_id', 'num_versions', 'uploaded_by')
+
+    def __init__(self, _client, json):
+        self._client = _client
+        for name in self.__slots__[1:]:
+            setattr(self, name, json.get(name))
+
+    def resource(self):
+        """Get Folder or File object for this entry, with attributes from the listing."""
+        attributes = dict((name, getattr(self, name)) for name in self.__slots__[1:] if getattr(self, name) is not None)
+        return (Folder if self.is_folder else File)(self._client, **attributes)
+
+    def __repr__(self):
+        return 'Entry(%r)' % self.path
+
+
 class Link(base.Resource):
     """Link to a file or folder"""
     _url_template = "pubapi/v1/links/%(id)s"
@@ -394,6 +659,8 @@ class Links(base.HasClient):
         * count: Send this number of links. If not specified, all links will be sent.
 
         Returns a list of Link objects, with additional total_count and offset attributes.
+        Links have only ids, other attributes are fetched one link at a time when accessed.
+        Use hydrate to fetch them for all links at once, or list_v2 which returns them in the listing.
         """
         url = self._client.get_url(self._url_template)
         params = base.filter_none_values(dict(path=path, username=username, created_before=base.date_format(created_before),
@@ -401,7 +668,30 @@ class Links(base.HasClient):
                                               offset=offset, count=count))
         json = exc.default.check_json_response(self._client.GET(url, params=params))
         return base.ResultList((Link(self._client, id=id) for id in json.get('ids', ())), json['total_count'], json['offset'])
+
+    def paginate(self, page_size=100, limit=None, prefetch=True, **kwargs):
+        """
+        Iterate over all links that match conditions (same keyword arguments as list), fetching page_size links at a time.
+        Returns a base.Paginator of Link objects, with up to 'limit' links.
+        """
+        return base.Paginator(lambda offset, count: self.list(offset=offset, count=count, **kwargs), page_size, limit, prefetch=prefetch,
+                              client=self._client)
     
+    def hydrate(self, links, jobs=4):
+        """
+        Fetch attributes of many links, with up to 'jobs' requests at the same time.
+        Links that already have their attributes are skipped.
+        Returns the same links.
+        """
+        missing = [link for link in links if 'path' not in link.__dict__]
+        if missing:
+            jobs = min(jobs, len(missing))
+            self._client.ensure_pool_size(jobs)
+            with ThreadPoolExecutor(jobs) as executor:
+                for _ in executor.map(Link._fetch_attributes, missing):
+                    pass
+        return links
+
     def list_v2(self, path=None, username=None, created_before=None, created_after=None, type=None, accessibility=None,
                 offset=None, count=None, link_type=None):
         """
@@ -444,6 +734,14 @@ class Users(base.HasClient):
         json = exc.default.check_json_response(self._client.GET(url, params=params))
         return base.ResultList((User(self._client, **d) for d in json.get('resources', ())), json['totalResults'], json['startIndex'] - 1)
 
+    def paginate(self, page_size=100, limit=None, prefetch=True, **kwargs):
+        """
+        Iterate over all users that match search parameters (same keyword arguments as list), fetching page_size users at a time.
+        Returns a base.Paginator of User objects, with up to 'limit' users.
+        """
+        return base.Paginator(lambda offset, count: self.list(startIndex=offset + 1, count=count, **kwargs), page_size, limit, prefetch=prefetch,
+                              client=self._client)
+
     def get(self, id):
         """Get a User object by id. Does not check if User exists."""
         return User(self._client, id=id)
@@ -531,7 +829,7 @@ class Notes(base.HasClient):
         json = exc.created.check_json_response(self._client.POST(url, data))
         return Note(self._client, **json)
 
-    def list(self, file=None, folder=None, start_time=None, end_time=None):
+    def list(self, file=None, folder=None, start_time=None, end_time=None, offset=None, count=None):
         """
         List existing notes.
         Optional filtering parameters:
@@ -540,15 +838,25 @@ class Notes(base.HasClient):
         * file: Get only notes attached to a specific file (path).
         * folder: Get only notes atatched to files in specific folder (path).
         * end_time: Get notes created before end_time (datetime.date or string in 'YYYY-MM-DD' format)
+        * offset: Start at this note, where offset=0 means start with first note.
+        * count: Send this number of notes.
 
         Returns list of Note objects, with additional attributes total_count and offset.
         """
         url = self._client.get_url(self._url_template)
         params = base.filter_none_values(dict(file=file, folder=folder, start_time=base.date_format(start_time),
-                                              end_time=base.date_format(end_time)))
+                                              end_time=base.date_format(end_time), offset=offset, count=count))
         json = exc.default.check_json_response(self._client.GET(url, params=params))
         return base.ResultList((Note(self._client, **d) for d in json.pop('notes', ())), json['total_results'], json['offset'])
 
+    def paginate(self, page_size=100, limit=None, prefetch=True, **kwargs):
+        """
+        Iterate over all notes that match filtering parameters (same keyword arguments as list), fetching page_size notes at a time.
+        Returns a base.Paginator of Note objects, with up to 'limit' notes.
+        """
+        return base.Paginator(lambda offset, count: self.list(offset=offset, count=count, **kwargs), page_size, limit, prefetch=prefetch,
+                              client=self._client)
+
 
 class Groups(base.HasClient):
     """
@@ -576,6 +884,14 @@ class Groups(base.HasClient):
         json = exc.default.check_json_response(self._client.GET(url, params=params))
         return base.ResultList((Group(self._client, **d) for d in json.pop('resources', ())), json['totalResults'], json['startIndex'] - 1)
 
+    def paginate(self, page_size=100, limit=None, prefetch=True, **kwargs):
+        """
+        Iterate over all groups that match filtering parameters (same keyword arguments as list), fetching page_size groups at a time.
+        Returns a base.Paginator of Group objects, with up to 'limit' groups.
+        """
+        return base.Paginator(lambda offset, count: self.list(startIndex=offset + 1, count=count, **kwargs), page_size, limit, prefetch=prefetch,
+                              client=self._client)
+
     def create(self, displayName, members=None):
         """
         Create a new Group. Parameters:
@@ -699,5 +1015,19 @@ class Search(base.HasClient):
             sort_by=sort_by,
             sort_direction=sort_direction)
         )
+        return self._files(url, params)
+
+    def paginate(self, page_size=100, limit=None, prefetch=True, **kwargs):
+        """
+        Iterate over all search results (same keyword arguments as files), fetching page_size results at a time (max 100).
+        Returns a base.Paginator of SearchMatch objects, with up to 'limit' results.
+        """
+        return base.Paginator(lambda offset, count: self.files(offset=offset, count=count, **kwargs), min(page_size, 100), limit,
+                              prefetch=prefetch, client=self._client)
+
+    def _files(self, url, params):
         json = exc.default.check_json_response(self._client.POST(url, json=params))
+        return self._results(json)
+
+    def _results(self, json):
         return base.ResultList((SearchMatch(self._client, **d) for d in json.get('results', ())), json['total_count'], json['offset'], json['hasMore'])
@@ -0,0 +1,213 @@
+"""
+Small in-process imitation of the parts of Egnyte API used by tests that don't need a real domain.
+It keeps files in memory and supports listing, simple and chunked uploads, downloads (with ranges),
+search and the events cursor.
+"""
+
+import email.utils
+import hashlib
+import json
+import re
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from egnyte import client
+
+
+class FakeEgnyte(object):
+    """
+    Fake API server running in a background thread.
+
+    * files - dictionary of file contents (bytes) by path
+    * folders - set of folder paths
+    * log - list of (method, path, headers) of received requests
+    * fail_next - list of HTTP statuses returned instead of handling the next requests
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.mtimes = {}
+        self.folders = {'/Shared'}
+        self.uploads = {}
+        self.log = []
+        self.fail_next = []
+        self.latest_event_id = 0
+        self.lock = threading.Lock()
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.fake = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d/' % self.server.server_address[1]
+
+    def client(self, **config):
+        """Get EgnyteClient that talks to this server."""
+        egnyte = client.EgnyteClient(dict(dict(domain='example', access_token='token'), **config))
+        egnyte._url_prefix = self.url
+        return egnyte
+
+    def requests(self, method, prefix):
+        """Get paths of logged requests with this method and path prefix."""
+        with self.lock:
+            return [path for m, path, _ in self.log if m == method and path.startswith(prefix)]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def move(self, path, destination, copy=False):
+        """Move or copy a file or a folder with everything inside it."""
+        def moved(p):
+            return destination + p[len(path):] if p == path or p.startswith(path + '/') else None
+        for p in [p for p in self.files if moved(p)]:
+            self.files[moved(p)] = self.files[p] if copy else self.files.pop(p)
+        for p in [p for p in self.folders if moved(p)]:
+            if not copy:
+                self.folders.discard(p)
+            self.folders.add(moved(p))
+
+    def entry(self, path):
+        if path in self.files:
+            return dict(name=path.rsplit('/', 1)[1], path=path, is_folder=False, size=len(self.files[path]),
+                        checksum=hashlib.sha512(self.files[path]).hexdigest(), entry_id=path, num_versions=1,
+                        last_modified=email.utils.formatdate(self.mtimes.get(path, 0), usegmt=True))
+        return dict(name=path.rsplit('/', 1)[1], path=path, is_folder=True, folder_id=path)
+
+
+class _Server(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body=b'', headers=None):
+        headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self, handler):
+        fake = self.server.fake
+        url = urlparse(self.path)
+        path = unquote(url.path)
+        data = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        with fake.lock:
+            fake.log.append((self.command, path, dict(self.headers)))
+            if fake.fail_next:
+                return self.reply(fake.fail_next.pop(0), {'errorMessage': 'Injected failure'})
+            return handler(fake, path, parse_qs(url.query), data)
+
+    def do_GET(self):
+        self.handle_request(self.get)
+
+    def do_POST(self):
+        self.handle_request(self.post)
+
+    def do_DELETE(self):
+        self.handle_request(self.delete)
+
+    def get(self, fake, path, query, data):
+        if path.startswith('/pubapi/v1/fs-content/'):
+            path = path[len('/pubapi/v1/fs-content'):]
+            if path not in fake.files:
+                return self.reply(404, {'errorMessage': 'File not found'})
+            content = fake.files[path]
+            match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+            if match is None:
+                return self.reply(200, content)
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(content) - 1
+            return self.reply(206, content[start:end + 1], {'Content-Range': 'bytes %d-%d/%d' % (start, end, len(content))})
+        if path.startswith('/pubapi/v1/fs/'):
+            path = path[len('/pubapi/v1/fs'):].rstrip('/')
+            if path in fake.files:
+                return self.reply(200, fake.entry(path))
+            if path not in fake.folders:
+                return self.reply(404, {'errorMessage': 'Folder not found'})
+            folders = sorted(p for p in fake.folders if p.rsplit('/', 1)[0] == path and p != path)
+            files = sorted(p for p in fake.files if p.rsplit('/', 1)[0] == path)
+            entries = folders + files
+            offset = int(query.get('offset', ['0'])[0])
+            count = int(query.get('count', [str(len(entries))])[0])
+            page = entries[offset:offset + count]
+            return self.reply(200, dict(fake.entry(path), total_count=len(entries), offset=offset, count=len(page),
+                                        folders=[fake.entry(p) for p in page if p in fake.folders],
+                                        files=[fake.entry(p) for p in page if p in fake.files]))
+        if path == '/pubapi/v1/events/cursor':
+            return self.reply(200, dict(latest_event_id=fake.latest_event_id, oldest_event_id=0,
+                                        timestamp='2020-01-01T00:00:00.000Z'))
+        if path == '/pubapi/v1/events':
+            return self.reply(204)
+        return self.reply(404, {'errorMessage': 'Not found'})
+
+    def post(self, fake, path, query, data):
+        if path.startswith('/pubapi/v1/fs-content-chunked/'):
+            path = path[len('/pubapi/v1/fs-content-chunked'):]
+            number = int(self.headers['x-egnyte-chunk-num'])
+            upload_id = self.headers.get('x-egnyte-upload-id')
+            if number == 1:
+                upload_id = uuid.uuid4().hex
+                fake.uploads[upload_id] = {}
+            elif upload_id not in fake.uploads:
+                return self.reply(404, {'errorMessage': 'Upload not found'})
+            fake.uploads[upload_id][number] = data
+            if self.headers.get('x-egnyte-last-chunk') == 'true':
+                chunks = fake.uploads.pop(upload_id)
+                if sorted(chunks) != list(range(1, number + 1)):
+                    return self.reply(400, {'errorMessage': 'Missing chunks'})
+                fake.files[path] = b''.join(chunks[n] for n in range(1, number + 1))
+                fake.mtimes[path] = time.time()
+            return self.reply(200, b'', {'x-egnyte-upload-id': upload_id,
+                                         'x-egnyte-chunk-sha512-checksum': hashlib.sha512(data).hexdigest()})
+        if path == '/pubapi/v2/search':
+            params = json.loads(data.decode('utf-8'))
+            results = [fake.entry(p) for p in sorted(fake.files) if params['query'] in p.rsplit('/', 1)[1]]
+            offset = params.get('offset', 0)
+            count = params.get('count', 100)
+            return self.reply(200, dict(results=results[offset:offset + count], total_count=len(results), offset=offset,
+                                        hasMore=offset + count < len(results)))
+        if path.startswith('/pubapi/v1/fs-content/'):
+            path = path[len('/pubapi/v1/fs-content'):]
+            fake.files[path] = data
+            fake.mtimes[path] = time.time()
+            return self.reply(200, {}, {'X-Sha512-Checksum': hashlib.sha512(data).hexdigest()})
+        if path.startswith('/pubapi/v1/fs/'):
+            path = path[len('/pubapi/v1/fs'):].rstrip('/')
+            params = json.loads(data.decode('utf-8'))
+            if params['action'] == 'add_folder':
+                if path in fake.folders:
+                    return self.reply(403, {'errorMessage': 'Folder already exists at this location'})
+                fake.folders.add(path)
+                return self.reply(201, {})
+            if params['action'] in ('copy', 'move'):
+                if path not in fake.files and path not in fake.folders:
+                    return self.reply(404, {'errorMessage': 'Not found'})
+                fake.move(path, params['destination'], params['action'] == 'copy')
+                return self.reply(200, {})
+        return self.reply(404, {'errorMessage': 'Not found'})
+
+    def delete(self, fake, path, query, data):
+        if path.startswith('/pubapi/v1/fs/'):
+            path = path[len('/pubapi/v1/fs'):].rstrip('/')
+            if path not in fake.files and path not in fake.folders:
+                return self.reply(404, {'errorMessage': 'Not found'})
+            fake.files = {p: content for p, content in fake.files.items() if p != path and not p.startswith(path + '/')}
+            fake.folders = {p for p in fake.folders if p != path and not p.startswith(path + '/')}
+            return self.reply(200, {})
+        return self.reply(404, {'errorMessage': 'Not found'})
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+from egnyte import exc
+from egnyte.tests.fake_server import FakeEgnyte
+
+try:
+    from egnyte import aio
+except ImportError:
+    aio = None
+
+
+@unittest.skipIf(aio is None, "aiohttp is not installed")
+class TestAsyncClient(unittest.TestCase):
+    """Asyncio client talking to a fake server."""
+
+    def setUp(self):
+        self.server = FakeEgnyte()
+        self.server.folders.add('/Shared/folder')
+        self.server.files['/Shared/folder/a.txt'] = b'first file'
+        self.server.files['/Shared/folder/b.txt'] = b'second file'
+        self.loop = asyncio.new_event_loop()
+        self.egnyte = aio.AsyncEgnyteClient(dict(domain='example', access_token='token', retry_backoff=0.01))
+        self.egnyte._url_prefix = self.server.url
+
+    def tearDown(self):
+        self.wait(self.egnyte.close())
+        self.loop.close()
+        self.server.close()
+
+    def wait(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_query(self):
+        self.assertEqual(aio._query(dict(a=True, b=[1, 'x'], c='y')), [('a', 'True'), ('b', '1'), ('b', 'x'), ('c', 'y')])
+
+    def test_list(self):
+        folder = self.wait(self.egnyte.folder('/Shared/folder').list())
+
+        self.assertEqual([f.name for f in folder.files], ['a.txt', 'b.txt'])
+        self.assertEqual(folder.files[0].size, len(b'first file'))
+
+    def test_get(self):
+        obj = self.wait(self.egnyte.get('/Shared/folder/a.txt'))
+
+        self.assertIsInstance(obj, aio.AsyncFile)
+        self.assertEqual(obj.checksum, hashlib.sha512(b'first file').hexdigest())
+        with self.assertRaises(exc.NotFound):
+            self.wait(self.egnyte.get('/Shared/missing'))
+
+    def test_upload(self):
+        self.wait(self.egnyte.file('/Shared/folder/small.txt').upload('small file'))
+        self.assertEqual(self.server.files['/Shared/folder/small.txt'], b'small file')
+
+        content = os.urandom(95)
+        cloud_file = self.egnyte.file('/Shared/folder/big.bin')
+        cloud_file._upload_chunk_size = 10
+        progress = []
+        self.wait(cloud_file.upload((content[i:i + 7] for i in range(0, len(content), 7)),
+                                    lambda cloud_file, size, uploaded: progress.append(uploaded)))
+        self.assertEqual(self.server.files['/Shared/folder/big.bin'], content)
+        self.assertEqual(len(self.server.requests('POST', '/pubapi/v1/fs-content-chunked/')), 10)
+        self.assertEqual(progress[-1], len(content))
+
+    def test_upload_async_iterable(self):
+        content = os.urandom(95)
+        cloud_file = self.egnyte.file('/Shared/folder/big.bin')
+        cloud_file._upload_chunk_size = 10
+
+        async def blocks():
+            for i in range(0, len(content), 7):
+                await asyncio.sleep(0)
+                yield content[i:i + 7]
+
+        self.wait(cloud_file.upload(blocks()))
+        self.assertEqual(self.server.files['/Shared/folder/big.bin'], content)
+
+    def test_upload_reads_file_outside_event_loop(self):
+        content = os.urandom(25)
+        cloud_file = self.egnyte.file('/Shared/folder/big.bin')
+        cloud_file._upload_chunk_size = 10
+        fp = io.BytesIO(content)
+        readers = set()
+
+        def read(size=-1):
+            readers.add(threading.get_ident())
+            return io.BytesIO.read(fp, size)
+        fp.read = read
+
+        self.wait(cloud_file.upload(fp))
+        self.assertEqual(self.server.files['/Shared/folder/big.bin'], content)
+        self.assertNotIn(threading.get_ident(), readers)
+
+    def test_download(self):
+        cloud_file = self.egnyte.file('/Shared/folder/a.txt')
+
+        self.assertEqual(self.wait(self.wait(cloud_file.download()).read()), b'first file')
+        self.assertEqual(self.wait(self.wait(cloud_file.download((6, None))).read()), b'file')
+        with tempfile.TemporaryDirectory() as directory:
+            local_path = os.path.join(directory, 'a.txt')
+            self.wait(cloud_file.save_to(local_path))
+            with open(local_path, 'rb') as fp:
+                self.assertEqual(fp.read(), b'first file')
+
+    def test_search(self):
+        results = self.wait(self.egnyte.search.files('b.txt'))
+
+        self.assertEqual([match.path for match in results], ['/Shared/folder/b.txt'])
+        self.assertEqual(results.total_count, 1)
+
+    def test_retry(self):
+        self.server.fail_next.extend([503, 502])
+
+        folder = self.wait(self.egnyte.folder('/Shared/folder').list())
+
+        self.assertEqual(len(folder.files), 2)
+        self.assertEqual(len(self.server.requests('GET', '/pubapi/v1/fs/Shared/folder')), 3)
+
+    def test_no_retry_after_client_error(self):
+        self.server.fail_next.append(400)
+
+        with self.assertRaises(exc.EgnyteError):
+            self.wait(self.egnyte.folder('/Shared/folder').list())
+        self.assertEqual(len(self.server.requests('GET', '/pubapi/v1/fs/Shared/folder')), 1)
+
+    def test_paginate_search(self):
+        self.server.files['/Shared/folder/c.txt'] = b'third file'
+
+        async def search(**kwargs):
+            return [match.path async for match in self.egnyte.search.paginate(query='txt', page_size=2, **kwargs)]
+
+        self.assertEqual(self.wait(search()), ['/Shared/folder/a.txt', '/Shared/folder/b.txt', '/Shared/folder/c.txt'])
+        self.assertEqual(self.wait(search(limit=1)), ['/Shared/folder/a.txt'])
+        with self.assertRaises(TypeError):
+            list(self.egnyte.search.paginate(query='txt'))
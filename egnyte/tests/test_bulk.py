@@ -0,0 +1,82 @@
+import os
+import tempfile
+
+from egnyte import base, client
+from egnyte.tests.config import EgnyteTestCase
+
+LOCAL_FOLDER_NAME = 'local'
+SUB_FOLDER_NAME = 'subfolder'
+FILE_NAMES = ['file%d.txt' % i for i in range(5)]
+FILE_CONTENT = b'TEST FILE CONTENT'
+
+
+class SkippedCallbacks(client.ProgressCallbacks):
+    def __init__(self):
+        self.skipped_paths = []
+
+    def skipped(self, cloud_obj, reason):
+        self.skipped_paths.append(cloud_obj.path)
+
+
+class TestBulkTransfers(EgnyteTestCase):
+    def setUp(self):
+        super(TestBulkTransfers, self).setUp()
+        self.local_dir = tempfile.TemporaryDirectory()
+        self.local_root = os.path.join(self.local_dir.name, LOCAL_FOLDER_NAME)
+        os.makedirs(os.path.join(self.local_root, SUB_FOLDER_NAME))
+        for name in FILE_NAMES:
+            for path in (os.path.join(self.local_root, name), os.path.join(self.local_root, SUB_FOLDER_NAME, name)):
+                with open(path, 'wb') as fp:
+                    fp.write(FILE_CONTENT)
+
+    def tearDown(self):
+        self.local_dir.cleanup()
+        super(TestBulkTransfers, self).tearDown()
+
+    def test_concurrent_bulk_upload(self):
+        self.egnyte.bulk_upload([self.local_root], self.root_folder.path, jobs=4)
+
+        uploaded = self.root_folder.folder(LOCAL_FOLDER_NAME).list()
+        self.assertEqual(sorted(FILE_NAMES), sorted(f.name for f in uploaded.files))
+        subfolder = uploaded.folder(SUB_FOLDER_NAME).list()
+        self.assertEqual(sorted(FILE_NAMES), sorted(f.name for f in subfolder.files))
+
+    def test_concurrent_bulk_download(self):
+        self.egnyte.bulk_upload([self.local_root], self.root_folder.path)
+
+        with tempfile.TemporaryDirectory() as target:
+            self.egnyte.bulk_download([self.root_folder.folder(LOCAL_FOLDER_NAME).path], target, jobs=4)
+
+            for name in FILE_NAMES:
+                for path in (os.path.join(target, LOCAL_FOLDER_NAME, name), os.path.join(target, LOCAL_FOLDER_NAME, SUB_FOLDER_NAME, name)):
+                    with open(path, 'rb') as fp:
+                        self.assertEqual(fp.read(), FILE_CONTENT)
+
+    def test_bulk_upload_skip_unchanged(self):
+        hash_cache = base.HashCache(os.path.join(self.local_dir.name, 'checksums.json'))
+        self.egnyte.bulk_upload([self.local_root], self.root_folder.path)
+        with open(os.path.join(self.local_root, FILE_NAMES[0]), 'wb') as fp:
+            fp.write(FILE_CONTENT + FILE_CONTENT)
+        callbacks = SkippedCallbacks()
+
+        self.egnyte.bulk_upload([self.local_root], self.root_folder.path, progress_callbacks=callbacks,
+                                skip_unchanged=True, hash_cache=hash_cache)
+
+        self.assertEqual(len(FILE_NAMES) * 2 - 1, len(callbacks.skipped_paths))
+        self.assertNotIn(self.root_folder.path + '/' + LOCAL_FOLDER_NAME + '/' + FILE_NAMES[0], callbacks.skipped_paths)
+
+    def test_bulk_download_sync(self):
+        self.egnyte.bulk_upload([self.local_root], self.root_folder.path)
+        cloud_path = self.root_folder.folder(LOCAL_FOLDER_NAME).path
+
+        with tempfile.TemporaryDirectory() as target:
+            self.egnyte.bulk_download([cloud_path], target, sync=True)
+            with open(os.path.join(target, LOCAL_FOLDER_NAME, FILE_NAMES[0]), 'wb') as fp:
+                fp.write(FILE_CONTENT.lower())
+            callbacks = SkippedCallbacks()
+
+            self.egnyte.bulk_download([cloud_path], target, progress_callbacks=callbacks, sync=True)
+
+            self.assertEqual(len(FILE_NAMES) * 2 - 1, len(callbacks.skipped_paths))
+            with open(os.path.join(target, LOCAL_FOLDER_NAME, FILE_NAMES[0]), 'rb') as fp:
+                self.assertEqual(fp.read(), FILE_CONTENT)
@@ -1,4 +1,9 @@
+import time
+import unittest
+
+from egnyte import base, client, events
 from egnyte.tests.config import EgnyteTestCase
+from egnyte.tests.fake_server import FakeEgnyte
 
 FOLDER_NAME = 'EVENT'
 
@@ -27,3 +32,34 @@ class TestEvents(EgnyteTestCase):
         self.assertEqual(results[0].action, 'create')
         self.assertEqual(results[0].data['target_path'], folder.path)
         self.assertEqual(results[0].data['is_folder'], True)
+
+    def test_cache_invalidator(self):
+        self.egnyte.metadata_cache = base.MetadataCache(ttl=600)
+        folder = self.root_folder.folder(FOLDER_NAME).create()
+        with events.CacheInvalidator(self.egnyte, poll_delay=0.5):
+            self.assertEqual(folder.list().folders, [])
+            other = client.EgnyteClient(self.config)
+            other.folder(folder.path).folder('sub').create()
+            for _ in range(30):
+                if folder.list().folders:
+                    break
+                time.sleep(1)
+            self.assertEqual([f.name for f in folder.list().folders], ['sub'])
+
+
+class TestCacheInvalidatorRestart(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeEgnyte()
+        self.egnyte = self.server.client(metadata_cache=True)
+
+    def tearDown(self):
+        self.egnyte.close()
+        self.server.close()
+
+    def test_restart_uses_current_cursor(self):
+        invalidator = events.CacheInvalidator(self.egnyte, poll_delay=0.01)
+        with invalidator:
+            self.assertEqual(invalidator.events.start_id, 0)
+        self.server.latest_event_id = 5
+        with invalidator:
+            self.assertEqual(invalidator.events.start_id, 5, "Events before restart should not be replayed")
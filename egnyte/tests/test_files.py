@@ -1,5 +1,12 @@
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+
 from egnyte.tests.config import EgnyteTestCase
-from egnyte import exc
+from egnyte import base, exc
+from egnyte.tests.fake_server import FakeEgnyte
 from egnyte.tests.helpers import upload_file
 
 FILE_FIRST_VERSION_NAME = 'FILE1.png'
@@ -9,6 +16,8 @@ DOWNLOADED_FILE_NAME = 'DOWNLOADED.png'
 EGNYTE_FILE_NAME_IMAGE = '/sample.png'
 EGNYTE_FILE_NAME_TEXT = '/test.txt'
 DESTINATION_FOLDER_NAME = 'to_here'
+EGNYTE_FILE_NAME_BIG = '/big.bin'
+CHUNK_SIZE = 10 * 1024 * 1024
 
 
 class TestFiles(EgnyteTestCase):
@@ -68,3 +77,198 @@ class TestFiles(EgnyteTestCase):
         file_attributes = second_version._fetch_attributes()
 
         self.assertEqual(file_attributes['num_versions'], 2)
+
+    def test_upload_file_in_parallel_chunks(self):
+        uploaded_file = self.egnyte.file(self.root_folder.path + EGNYTE_FILE_NAME_BIG)
+        uploaded_file._upload_chunk_size = CHUNK_SIZE
+        content = os.urandom(CHUNK_SIZE * 3 + 1)
+
+        uploaded_file.upload(content, jobs=3)
+        file_attributes = uploaded_file._fetch_attributes()
+
+        self.assertEqual(file_attributes['size'], len(content))
+        self.assertEqual(file_attributes['checksum'], hashlib.sha512(content).hexdigest())
+
+    def test_upload_stream(self):
+        uploaded_file = self.egnyte.file(self.root_folder.path + EGNYTE_FILE_NAME_BIG)
+        uploaded_file._upload_chunk_size = CHUNK_SIZE
+        content = os.urandom(CHUNK_SIZE * 2 + 1)
+
+        uploaded_file.upload(content[i:i + 4096] for i in range(0, len(content), 4096))
+        file_attributes = uploaded_file._fetch_attributes()
+
+        self.assertEqual(file_attributes['size'], len(content))
+        self.assertEqual(file_attributes['checksum'], hashlib.sha512(content).hexdigest())
+
+    def test_download_file_in_parallel_ranges(self):
+        uploaded_file = self.egnyte.file(self.root_folder.path + EGNYTE_FILE_NAME_BIG)
+        content = os.urandom(CHUNK_SIZE + 1)
+        uploaded_file.upload(content)
+        uploaded_file._download_chunk_size = CHUNK_SIZE // 4
+
+        with tempfile.TemporaryDirectory() as local_dir:
+            local_path = os.path.join(local_dir, DOWNLOADED_FILE_NAME)
+            uploaded_file.save_to(local_path, jobs=3)
+
+            with open(local_path, 'rb') as fp:
+                self.assertEqual(fp.read(), content)
+
+    def test_resume_download(self):
+        uploaded_file = self.egnyte.file(self.root_folder.path + EGNYTE_FILE_NAME_TEXT)
+        uploaded_file.upload(TEXT_FILE_CONTENT)
+
+        with tempfile.TemporaryDirectory() as local_dir:
+            local_path = os.path.join(local_dir, DOWNLOADED_FILE_NAME)
+            with open(local_path, 'w') as fp:
+                fp.write(TEXT_FILE_CONTENT[:4])
+            uploaded_file.save_to(local_path, resume=True)
+
+            with open(local_path, 'r') as fp:
+                self.assertEqual(fp.read(), TEXT_FILE_CONTENT)
+
+
+class Pipe(object):
+    """File-like object that can only be read sequentially, in binary or text mode."""
+
+    def __init__(self, content):
+        self.fp = io.StringIO(content) if isinstance(content, str) else io.BytesIO(content)
+
+    def read(self, size=-1):
+        return self.fp.read(size)
+
+    def seekable(self):
+        return False
+
+
+class TestUploads(unittest.TestCase):
+    """Uploads to a fake server, with small chunks."""
+
+    def setUp(self):
+        self.server = FakeEgnyte()
+        self.egnyte = self.server.client()
+        self.file = self.egnyte.file('/Shared/big.bin')
+        self.file._upload_chunk_size = 10
+        self.content = os.urandom(95)
+        self.progress = []
+
+    def tearDown(self):
+        self.egnyte.close()
+        self.server.close()
+
+    def progress_callback(self, cloud_file, size, uploaded):
+        self.progress.append((size, uploaded))
+
+    def test_upload_pipe_with_size(self):
+        self.file.upload(Pipe(self.content), len(self.content), self.progress_callback, jobs=3)
+
+        self.assertEqual(self.server.files['/Shared/big.bin'], self.content)
+        self.assertEqual(self.progress[-1], (len(self.content), len(self.content)))
+
+    def test_upload_stream_of_unknown_size(self):
+        self.file.upload(Pipe(self.content), progress_callback=self.progress_callback, jobs=3)
+
+        self.assertEqual(self.server.files['/Shared/big.bin'], self.content)
+        self.assertEqual(self.progress[-1], (None, len(self.content)))
+
+    def test_upload_text_pipe(self):
+        content = 'zażółć gęślą jaźń\n' * 5
+
+        self.file.upload(Pipe(content), jobs=3)
+
+        self.assertEqual(self.server.files['/Shared/big.bin'], content.encode('utf-8'))
+
+    def sent_chunks(self):
+        with self.server.lock:
+            return [int(headers['x-egnyte-chunk-num']) for method, path, headers in self.server.log
+                    if path.startswith('/pubapi/v1/fs-content-chunked/')]
+
+    def interrupted_upload(self, journal, status=500, after=3):
+        def progress_callback(cloud_file, size, uploaded):
+            if uploaded == after * self.file._upload_chunk_size:
+                self.server.fail_next.append(status)
+        with self.assertRaises(exc.EgnyteError):
+            self.file.upload(self.content, progress_callback=progress_callback, journal=journal)
+        del self.server.log[:]
+
+    def test_resume_upload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal_path = os.path.join(directory, 'journal.json')
+            self.interrupted_upload(base.UploadJournal(journal_path))
+
+            self.file.upload(self.content, journal=base.UploadJournal(journal_path))
+
+            self.assertEqual(self.sent_chunks(), list(range(4, 11)))
+            self.assertEqual(self.server.files['/Shared/big.bin'], self.content)
+            self.assertFalse(os.path.exists(journal_path), "Journal should be removed after upload")
+
+    def test_resume_upload_error_keeps_journal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal_path = os.path.join(directory, 'journal.json')
+            self.interrupted_upload(base.UploadJournal(journal_path))
+            upload_id = base.UploadJournal(journal_path).upload_id
+
+            self.server.fail_next.append(500)
+            with self.assertRaises(exc.EgnyteError):
+                self.file.upload(self.content, journal=base.UploadJournal(journal_path))
+
+            self.assertEqual(self.sent_chunks(), [4], "Upload should not start over after a transient error")
+            self.assertEqual(base.UploadJournal(journal_path).upload_id, upload_id)
+
+    def test_resume_expired_upload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal_path = os.path.join(directory, 'journal.json')
+            self.interrupted_upload(base.UploadJournal(journal_path))
+            self.server.uploads.clear()
+
+            self.file.upload(self.content, journal=base.UploadJournal(journal_path))
+
+            self.assertEqual(self.sent_chunks(), [4] + list(range(1, 11)))
+            self.assertEqual(self.server.files['/Shared/big.bin'], self.content)
+
+    def test_changed_file_invalidates_journal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            local_path = os.path.join(directory, 'big.bin')
+            with open(local_path, 'wb') as fp:
+                fp.write(self.content)
+            self.interrupted_upload(base.UploadJournal.for_file(local_path, self.file.path, directory))
+            self.assertIsNotNone(base.UploadJournal.for_file(local_path, self.file.path, directory).upload_id)
+
+            self.content = self.content[:-1] + b'!!'
+            with open(local_path, 'wb') as fp:
+                fp.write(self.content)
+            journal = base.UploadJournal.for_file(local_path, self.file.path, directory)
+            self.assertIsNone(journal.upload_id, "Journal of a different version of the file should be ignored")
+
+            with open(local_path, 'rb') as fp:
+                self.file.upload(fp, journal=journal)
+            self.assertEqual(self.sent_chunks(), list(range(1, 11)))
+            self.assertEqual(self.server.files['/Shared/big.bin'], self.content)
+
+
+class TestDownloads(unittest.TestCase):
+    """Downloads from a fake server, with small ranges."""
+
+    def setUp(self):
+        self.server = FakeEgnyte()
+        self.egnyte = self.server.client()
+        self.content = os.urandom(95)
+        self.server.files['/Shared/big.bin'] = self.content
+        self.file = self.egnyte.file('/Shared/big.bin')
+        self.file._download_chunk_size = 10
+
+    def tearDown(self):
+        self.egnyte.close()
+        self.server.close()
+
+    def test_error_after_all_ranges(self):
+        def progress_callback(cloud_file, size, downloaded):
+            if downloaded == size:
+                raise ValueError("Interrupted")
+
+        with tempfile.TemporaryDirectory() as directory:
+            local_path = os.path.join(directory, 'big.bin')
+            with self.assertRaises(ValueError):
+                self.file.save_to(local_path, progress_callback, jobs=3)
+
+            with open(local_path, 'rb') as fp:
+                self.assertEqual(fp.read(), self.content, "Completely downloaded file should be kept")
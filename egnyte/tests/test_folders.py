@@ -75,3 +75,24 @@ class TestFolders(EgnyteTestCase):
         files_list = self.folder.files
         self.assertEqual(1, len(files_list), "There should be one file")
         self.assertEqual(files_list[0]._url, _file._url, "File URLs should be identical")
+
+    def test_folder_iter_children(self):
+        self.folder.create()
+        subfolder = self.folder.folder(SUB_FOLDER_NAME).create()
+        files = [self.folder.file('%d.txt' % i) for i in range(4)]
+        for _file in files:
+            _file.upload(FILE_CONTENT)
+
+        children = list(self.folder.iter_children(page_size=2))
+        self.assertEqual([child._url for child in children], [subfolder._url] + [_file._url for _file in files],
+                         "Subfolders should be listed before files, in all pages")
+
+    def test_folder_iter_entries(self):
+        self.folder.create()
+        _file = self.folder.file('entry.txt')
+        _file.upload(FILE_CONTENT)
+
+        entries = list(self.folder.iter_entries())
+        self.assertEqual([entry.path for entry in entries], [_file.path])
+        self.assertEqual(entries[0].size, len(FILE_CONTENT))
+        self.assertEqual(entries[0].resource()._url, _file._url, "Entry should convert to the same File")
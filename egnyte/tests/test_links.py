@@ -67,6 +67,14 @@ class TestLinks(EgnyteTestCase):
         self.assertEqual(tuple(all_links), tuple(past),
                          "List of links created before tomorrow should include all links")
 
+    def test_hydrate_links(self):
+        self.folder.link(ACCESSIBILITY_DOMAIN)
+        links = self.egnyte.links.hydrate(self.egnyte.links.list(path=self.root_folder.path))
+
+        self.assertEqual(1, len(links))
+        self.assertIn('path', links[0].__dict__, "Link attributes should be fetched")
+        self.__verify_link(links[0], self.root_folder.path, ACCESSIBILITY_DOMAIN, 'folder')
+
     def __verify_link(self, link, path, accessibility, link_type):
         self.assertEqual(link.path, path)
         self.assertEqual(link.accessibility, accessibility)
@@ -0,0 +1,41 @@
+import unittest
+
+from egnyte import base, client, metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = metrics.Metrics(buckets=(0.1, 1.0))
+        self.metrics.request('GET', 'pubapi/v1/fs%(path)s', 200, 0.05, 0, 100)
+        self.metrics.request('GET', 'pubapi/v1/fs%(path)s', 404, 0.5, 0, 10)
+        self.metrics.request('POST', 'pubapi/v1/fs-content%(path)s', None, 2.0, 1000)
+        self.metrics.retry('POST', 'pubapi/v1/fs-content%(path)s', 0.5)
+        self.metrics.rate_limited(0.25)
+
+    def test_snapshot(self):
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['rate_limit_sleep'], 0.25)
+        self.assertEqual(snapshot['retry_sleep'], 0.5)
+        get, post = snapshot['endpoints']
+        self.assertEqual((get['method'], get['count'], get['statuses']), ('GET', 2, {200: 1, 404: 1}))
+        self.assertEqual(get['histogram'], [[0.1, 1], [1.0, 2], [float('inf'), 2]])
+        self.assertEqual(get['bytes_received'], 110)
+        self.assertEqual((post['bytes_sent'], post['retries'], post['statuses']), (1000, 1, {None: 1}))
+        self.assertEqual(post['histogram'], [[0.1, 0], [1.0, 0], [float('inf'), 1]])
+
+    def test_prometheus(self):
+        text = self.metrics.to_prometheus()
+        self.assertIn('# TYPE egnyte_request_duration_seconds histogram', text)
+        self.assertIn('egnyte_requests_total{endpoint="pubapi/v1/fs%(path)s",method="GET",status="404"} 1', text)
+        self.assertIn('egnyte_requests_total{endpoint="pubapi/v1/fs-content%(path)s",method="POST",status="error"} 1', text)
+        self.assertIn('egnyte_request_duration_seconds_bucket{endpoint="pubapi/v1/fs%(path)s",le="+Inf",method="GET"} 2', text)
+        self.assertIn('egnyte_rate_limit_sleep_seconds_total 0.25', text)
+
+    def test_url_template(self):
+        egnyte = client.EgnyteClient(dict(domain='example', access_token='token', metrics=True))
+        self.assertIsInstance(egnyte.metrics, metrics.Metrics)
+        url = egnyte.folder('/Shared/a b')._url
+        self.assertEqual(url, 'https://example.egnyte.com/pubapi/v1/fs/Shared/a%20b')
+        self.assertEqual(url.template, 'pubapi/v1/fs%(path)s')
+        self.assertEqual(base._body_size(b'abc', None), 3)
+        self.assertEqual(base._body_size(iter(()), {'Content-Length': '7'}), 7)
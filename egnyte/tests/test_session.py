@@ -0,0 +1,373 @@
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import requests
+
+from egnyte import base, client, exc
+from egnyte.tests.fake_server import FakeEgnyte
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst(self):
+        limiter = base.RateLimiter(10, burst=5)
+        delays = [limiter.reserve() for _ in range(7)]
+        self.assertEqual(delays[:5], [0.0] * 5)
+        self.assertAlmostEqual(delays[5], 0.1, places=2)
+        self.assertAlmostEqual(delays[6], 0.2, places=2)
+
+    def test_threads(self):
+        limiter = base.RateLimiter(50)
+        start = time.monotonic()
+        threads = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(5)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 19 / 50.0)
+
+    def test_shared_by_api_key(self):
+        config = dict(domain='example', access_token='token', api_key='test_shared_by_api_key', requests_per_second=2)
+        first = client.EgnyteClient(config)
+        second = client.EgnyteClient(dict(config, access_token='other token'))
+        other = client.EgnyteClient(dict(config, api_key='other key'))
+        self.assertIs(first.rate_limiter, second.rate_limiter)
+        self.assertIsNot(first.rate_limiter, other.rate_limiter)
+        self.assertEqual(first.rate_limiter.rate, 2.0)
+
+    def test_no_limit(self):
+        self.assertIsNone(client.EgnyteClient(dict(domain='example', access_token='token')).rate_limiter)
+
+
+class TestFileRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ratelimit')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_shared_by_file(self):
+        first = base.FileRateLimiter(self.path, 10, burst=2)
+        second = base.FileRateLimiter(self.path, 10, burst=2)
+        self.assertEqual(first.reserve(), 0.0)
+        self.assertEqual(second.reserve(), 0.0)
+        self.assertAlmostEqual(first.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(second.reserve(), 0.2, places=2)
+
+    def test_config(self):
+        config = dict(domain='example', access_token='token', requests_per_second=5, rate_limiter='file', rate_limiter_path=self.path)
+        limiter = client.EgnyteClient(config).rate_limiter
+        self.assertIsInstance(limiter, base.FileRateLimiter)
+        self.assertEqual(limiter.path, self.path)
+        self.assertIs(client.EgnyteClient(config).rate_limiter, limiter)
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+    def test_aimd(self):
+        limiter = base.AdaptiveRateLimiter(base.RateLimiter(10), min_rate=1, increase=1, successes=3)
+        limiter.over_quota()
+        self.assertEqual(limiter.rate, 5.0)
+        limiter.over_quota()  # within cooldown, ignored
+        self.assertEqual(limiter.rate, 5.0)
+        for _ in range(7):
+            limiter.succeeded()
+        self.assertEqual(limiter.rate, 7.0)
+        for _ in range(20):
+            limiter.succeeded()
+        self.assertEqual(limiter.rate, 10.0)
+        for _ in range(5):
+            limiter._decreased = None
+            limiter.over_quota()
+        self.assertEqual(limiter.rate, 1.0)
+
+    def test_config(self):
+        limiter = client.EgnyteClient(dict(domain='example', access_token='test_adaptive_config', adaptive_rate_limit=True)).rate_limiter
+        self.assertIsInstance(limiter, base.AdaptiveRateLimiter)
+        self.assertEqual(limiter.rate, base.DEFAULT_REQUESTS_PER_SECOND)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_backoff(self):
+        policy = base.RetryPolicy(retries=3, backoff=1.0, max_backoff=3.0)
+        for attempt, limit in ((1, 1.0), (2, 2.0), (3, 3.0)):
+            delay = policy.retry_delay(attempt)
+            self.assertTrue(0 <= delay <= limit)
+        self.assertIsNone(policy.retry_delay(4))
+        self.assertEqual(policy.counters['retries'], 3)
+
+    def test_budget(self):
+        policy = base.RetryPolicy(backoff=0, budget=2, budget_ratio=0.5)
+        self.assertIsNotNone(policy.retry_delay(1))
+        self.assertIsNotNone(policy.retry_delay(1))
+        self.assertIsNone(policy.retry_delay(1))
+        self.assertEqual(policy.counters['budget_exhausted'], 1)
+        policy.succeeded()
+        policy.succeeded()
+        self.assertIsNotNone(policy.retry_delay(1))
+
+    def test_over_quota(self):
+        policy = base.RetryPolicy(over_quota_retries=2)
+        response = requests.Response()
+        response.headers['retry-after'] = '3'
+        self.assertEqual(policy.over_quota_delay(1, response), 3.0)
+        self.assertEqual(policy.over_quota_delay(2, response), 3.0)
+        self.assertIsNone(policy.over_quota_delay(3, response))
+        self.assertEqual(policy.counters['over_quota'], 2)
+
+
+class TestFileChunk(unittest.TestCase):
+    def test_concurrent_rewind(self):
+        data = bytes(range(100))
+        lock = threading.Lock()
+
+        class File(io.BytesIO):
+            def read(self, size=-1):
+                # another chunk is rewound between seek and read of this one
+                other.rewind()
+                return io.BytesIO.read(self, size)
+
+        fp = File(data)
+        chunk = base._FileChunk(fp, 0, 10, lock)
+        other = base._FileChunk(fp, 50, 10, lock)
+        self.assertEqual(chunk.read(), data[:10])
+        other.read(5)
+        self.assertEqual(other.read(), data[55:60])
+
+
+class TestConnectionPool(unittest.TestCase):
+    def test_config(self):
+        egnyte = client.EgnyteClient(dict(domain='example', access_token='token', pool_maxsize=20, pool_block=True, tcp_keepalive=60))
+        adapter = egnyte._session.get_adapter('https://example.egnyte.com/')
+        self.assertEqual(adapter._pool_maxsize, 20)
+        self.assertTrue(adapter._pool_block)
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), adapter.socket_options)
+        self.assertIn((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1), adapter.socket_options)
+
+    def test_ensure_pool_size(self):
+        egnyte = client.EgnyteClient(dict(domain='example', access_token='token'))
+        egnyte.ensure_pool_size(4)
+        self.assertEqual(egnyte._session.get_adapter('https://example.egnyte.com/')._pool_maxsize, 10)
+        egnyte.ensure_pool_size(32)
+        self.assertEqual(egnyte._session.get_adapter('https://example.egnyte.com/')._pool_maxsize, 32)
+
+
+    def test_grow_pool_in_place(self):
+        egnyte = client.EgnyteClient(dict(domain='example', access_token='token'))
+        adapter = egnyte._session.get_adapter('https://example.egnyte.com/')
+        pool = adapter.poolmanager.connection_from_url('https://example.egnyte.com/')
+        egnyte.ensure_pool_size(32)
+        self.assertIs(egnyte._session.get_adapter('https://example.egnyte.com/'), adapter)
+        self.assertIs(adapter.poolmanager.connection_from_url('https://example.egnyte.com/'), pool)
+        self.assertEqual((pool.pool.maxsize, pool.pool.qsize()), (32, 32))
+        self.assertEqual(adapter.poolmanager.connection_from_url('https://other.egnyte.com/').pool.maxsize, 32)
+
+    def test_grow_pool_while_sending(self):
+        server = FakeEgnyte()
+        server.files['/Shared/a.txt'] = b'content'
+        egnyte = server.client()
+        errors = []
+
+        def download():
+            try:
+                for _ in range(10):
+                    if egnyte.file('/Shared/a.txt').download().read() != 'content':
+                        errors.append('Wrong content')
+            except Exception as e:
+                errors.append(e)
+        try:
+            threads = [threading.Thread(target=download) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for size in range(11, 40):
+                egnyte.ensure_pool_size(size)
+            for thread in threads:
+                thread.join()
+        finally:
+            egnyte.close()
+            server.close()
+        self.assertEqual(errors, [])
+
+    def test_fetch_all_pages_grows_pool(self):
+        server = FakeEgnyte()
+        server.files.update(('/Shared/%02d.txt' % i, b'x') for i in range(30))
+        egnyte = server.client()
+        try:
+            names = [f.name for f in egnyte.folder('/Shared').iter_children(page_size=2).fetch_all(jobs=16)]
+            pool_maxsize = egnyte._session.get_adapter(server.url)._pool_maxsize
+        finally:
+            egnyte.close()
+            server.close()
+        self.assertEqual(names, ['%02d.txt' % i for i in range(30)])
+        self.assertEqual(pool_maxsize, 16)
+
+
+class TestResourceURL(unittest.TestCase):
+    def test_lazy_url(self):
+        egnyte = client.EgnyteClient(dict(domain='example', access_token='token'))
+        _file = egnyte.file('/Shared/a b/%c.txt', size=1)
+        self.assertNotIn('_url', _file.__dict__)
+        self.assertEqual(_file._url, 'https://example.egnyte.com/pubapi/v1/fs/Shared/a%20b/%25c.txt')
+        self.assertEqual(_file._url.template, 'pubapi/v1/fs%(path)s')
+        self.assertIs(_file._url, _file._url)
+        self.assertEqual(egnyte.users.get(12)._url, 'https://example.egnyte.com/pubapi/v2/users/12')
+
+    def test_encode_path(self):
+        self.assertEqual(base.encode_path('/Shared/\u017c\u00f3\u0142w/a?b#c'), '/Shared/%C5%BC%C3%B3%C5%82w/a%3Fb%23c')
+        self.assertEqual(base.encode_path('name'), 'name')
+
+
+class TestMetadataCache(unittest.TestCase):
+    def test_lru(self):
+        cache = base.MetadataCache(ttl=60, size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+
+    def test_ttl(self):
+        cache = base.MetadataCache(ttl=0.01)
+        cache.put('a', 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate(self):
+        cache = base.MetadataCache()
+        for url in ('fs/a', 'fs/a/b', 'fs/a/b/c', 'fs/ab'):
+            cache.put(url, url)
+        cache.invalidate('fs/a/', prefix=True)
+        cache.invalidate('fs/ab')
+        self.assertEqual([cache.get(url) for url in ('fs/a', 'fs/a/b', 'fs/a/b/c', 'fs/ab')], ['fs/a', None, None, None])
+
+
+class TestMetadataCacheInvalidation(unittest.TestCase):
+    """Metadata cache of a client talking to a fake server."""
+
+    def setUp(self):
+        self.server = FakeEgnyte()
+        self.server.folders.update({'/Shared/a', '/Shared/a/b'})
+        self.server.files.update({'/Shared/a/b/c.txt': b'c', '/Shared/x.txt': b'x'})
+        self.egnyte = self.server.client(metadata_cache=True)
+
+    def tearDown(self):
+        self.egnyte.close()
+        self.server.close()
+
+    def names(self, path):
+        folder = self.egnyte.folder(path).list()
+        return [f.name for f in folder.folders] + [f.name for f in folder.files]
+
+    def test_served_from_cache(self):
+        self.assertEqual(self.egnyte.file('/Shared/x.txt').size, 1)
+        self.assertEqual(self.egnyte.file('/Shared/x.txt').size, 1)
+        self.assertEqual(self.egnyte.get('/Shared/x.txt').size, 1)
+        self.assertEqual(len(self.server.requests('GET', '/pubapi/v1/fs/Shared/x.txt')), 1)
+
+    def test_upload(self):
+        self.assertEqual(self.names('/Shared'), ['a', 'x.txt'])
+        self.assertEqual(self.egnyte.file('/Shared/x.txt').size, 1)
+
+        self.egnyte.file('/Shared/new.txt').upload(b'new')
+        self.egnyte.file('/Shared/x.txt').upload(b'longer')
+
+        self.assertEqual(self.names('/Shared'), ['a', 'new.txt', 'x.txt'])
+        self.assertEqual(self.egnyte.file('/Shared/x.txt').size, 6)
+
+    def test_create(self):
+        self.assertEqual(self.names('/Shared/a'), ['b'])
+        self.egnyte.folder('/Shared/a/d').create()
+        self.assertEqual(self.names('/Shared/a'), ['b', 'd'])
+
+    def test_delete(self):
+        self.assertEqual(self.names('/Shared'), ['a', 'x.txt'])
+        self.assertEqual(self.names('/Shared/a/b'), ['c.txt'])
+
+        self.egnyte.folder('/Shared/a').delete()
+
+        self.assertEqual(self.names('/Shared'), ['x.txt'])
+        with self.assertRaises(exc.NotFound):
+            self.egnyte.folder('/Shared/a/b').list()
+
+    def test_move(self):
+        self.assertEqual(self.names('/Shared'), ['a', 'x.txt'])
+        self.assertEqual(self.names('/Shared/a/b'), ['c.txt'])
+        self.assertEqual(self.names('/Shared/a'), ['b'])
+
+        self.egnyte.folder('/Shared/a/b').move('/Shared/b')
+
+        self.assertEqual(self.names('/Shared'), ['a', 'b', 'x.txt'])
+        self.assertEqual(self.names('/Shared/a'), [])
+        self.assertEqual(self.names('/Shared/b'), ['c.txt'])
+        with self.assertRaises(exc.NotFound):
+            self.egnyte.folder('/Shared/a/b').list()
+
+    def test_copy(self):
+        self.assertEqual(self.names('/Shared/a'), ['b'])
+
+        self.egnyte.file('/Shared/x.txt').copy('/Shared/a/y.txt')
+
+        self.assertEqual(self.names('/Shared/a'), ['b', 'y.txt'])
+        self.assertEqual(self.egnyte.file('/Shared/x.txt').size, 1)
+
+
+class TestPaginator(unittest.TestCase):
+    def pages(self, total, report_total=True):
+        calls = []
+
+        def fetch_page(offset, count):
+            calls.append((offset, count))
+            return base.ResultList(range(offset, min(offset + count, total)), total if report_total else None, offset)
+        return fetch_page, calls
+
+    def test_total_count(self):
+        fetch_page, calls = self.pages(25)
+        self.assertEqual(list(base.Paginator(fetch_page, page_size=10)), list(range(25)))
+        self.assertEqual(calls, [(0, 10), (10, 10), (20, 10)])
+
+    def test_short_page(self):
+        fetch_page, calls = self.pages(20, report_total=False)
+        self.assertEqual(list(base.Paginator(fetch_page, page_size=10, prefetch=False)), list(range(20)))
+        self.assertEqual(calls, [(0, 10), (10, 10), (20, 10)])
+
+    def test_has_more(self):
+        def fetch_page(offset, count):
+            calls.append((offset, count))
+            return base.ResultList(range(offset, min(offset + 5, 12)), None, offset, has_more=offset + 5 < 12)
+        calls = []
+        self.assertEqual(list(base.Paginator(fetch_page, page_size=10)), list(range(12)))
+        self.assertEqual(calls, [(0, 10), (5, 10), (10, 10)])
+
+    def test_limit(self):
+        fetch_page, calls = self.pages(100)
+        self.assertEqual(list(base.Paginator(fetch_page, page_size=10, limit=15, offset=5)), list(range(5, 20)))
+        self.assertEqual(calls, [(5, 10), (15, 5)])
+        self.assertEqual(list(base.Paginator(fetch_page, limit=0)), [])
+
+    def test_fetch_all(self):
+        fetch_page, calls = self.pages(95)
+        self.assertEqual(base.Paginator(fetch_page, page_size=10).fetch_all(jobs=3), list(range(95)))
+        self.assertEqual(sorted(calls), [(offset, 10) for offset in range(0, 90, 10)] + [(90, 5)])
+        del calls[:]
+        self.assertEqual(list(base.Paginator(fetch_page, page_size=10, limit=25).stream(jobs=3)), list(range(25)))
+        self.assertEqual(sorted(calls), [(0, 10), (10, 10), (20, 5)])
+
+    def test_fetch_all_short_pages(self):
+        def fetch_page(offset, count):
+            calls.append((offset, count))
+            return base.ResultList(range(offset, min(offset + count, offset + 4, 18)), 18, offset)
+        calls = []
+        self.assertEqual(base.Paginator(fetch_page, page_size=10).fetch_all(), list(range(18)))
+        self.assertEqual(sorted(calls), [(0, 10), (4, 4), (8, 4), (12, 4), (16, 2)])
+
+    def test_fetch_all_without_total_count(self):
+        fetch_page, calls = self.pages(25, report_total=False)
+        self.assertEqual(base.Paginator(fetch_page, page_size=10).fetch_all(), list(range(25)))
+        self.assertEqual(calls, [(0, 10), (10, 10), (20, 10)])
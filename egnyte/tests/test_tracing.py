@@ -0,0 +1,67 @@
+import io
+import json
+import unittest
+
+from egnyte import tracing
+from egnyte.tests.fake_server import FakeEgnyte
+
+
+class RecordingHooks(tracing.RequestHooks):
+    def __init__(self):
+        self.calls = []
+
+    def before_request(self, info):
+        self.calls.append(('before', dict(info)))
+
+    def after_request(self, info):
+        self.calls.append(('after', dict(info)))
+
+
+class TestJsonLinesTrace(unittest.TestCase):
+    def test_write(self):
+        fp = io.StringIO()
+        trace = tracing.JsonLinesTrace(fp)
+        trace.before_request(dict(method='GET'))
+        trace.after_request(dict(method='GET', template='pubapi/v1/fs%(path)s', status=200, timings=dict(total=0.5)))
+        trace.after_request(dict(method='POST', status=None, error=ValueError('x')))
+        lines = fp.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['timings'], dict(total=0.5))
+        self.assertEqual(json.loads(lines[1])['error'], 'x')
+
+
+class TestSessionHooks(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeEgnyte()
+        self.server.files['/Shared/a.txt'] = b'content'
+        self.egnyte = self.server.client(retry_backoff=0.01)
+        self.hooks = RecordingHooks()
+        self.egnyte.add_hook(self.hooks)
+
+    def tearDown(self):
+        self.egnyte.close()
+        self.server.close()
+
+    def test_hooks_called(self):
+        self.server.fail_next.append(503)
+        self.egnyte.file('/Shared/a.txt').check()
+
+        self.assertEqual([(when, info['attempt']) for when, info in self.hooks.calls],
+                         [('before', 0), ('after', 0), ('before', 1), ('after', 1)])
+        first, retry = self.hooks.calls[1][1], self.hooks.calls[3][1]
+        self.assertEqual((first['status'], retry['status']), (503, 200))
+        self.assertIsNotNone(first['retry_delay'])
+        self.assertIsNone(retry['retry_delay'])
+        self.assertEqual(retry['template'], 'pubapi/v1/fs%(path)s')
+        self.assertEqual(retry['url'], self.server.url + 'pubapi/v1/fs/Shared/a.txt')
+        timings = first['timings']
+        self.assertGreaterEqual(timings['dns'], 0)
+        self.assertGreaterEqual(timings['connect'], 0)
+        self.assertIsNone(timings['tls'], "Plain HTTP connection has no TLS handshake")
+        self.assertGreaterEqual(timings['total'], timings['ttfb'])
+        self.assertIsNone(retry['timings']['connect'], "Connection should be reused")
+
+    def test_remove_hook(self):
+        self.egnyte.remove_hook(self.hooks)
+        self.egnyte.file('/Shared/a.txt').check()
+        self.assertEqual(self.hooks.calls, [])
@@ -35,6 +35,11 @@ class TestUsers(unittest.TestCase):
         all_users = self.egnyte.users.list()
         self.assertGreaterEqual(len(all_users), 1)
 
+    def test_paginate_users(self):
+        all_users = self.egnyte.users.list()
+        paginated = list(self.egnyte.users.paginate(page_size=1, limit=3))
+        self.assertEqual(paginated, all_users[:3], "Paginated users should match the list")
+
     def test_create_user(self):
         user_by_email = self.users.by_email(EMAIL)
         self.assertEqual(self.user, user_by_email, "Should find user by email")
@@ -0,0 +1,56 @@
+"""
+Hooks called around every API request, for profiling and tracing.
+
+Inherit RequestHooks, override any of its methods and register it with client.add_hook(hooks).
+JsonLinesTrace writes information about every request to a file, one JSON object per line.
+"""
+
+import json
+import threading
+
+
+class RequestHooks(object):
+    """
+    Called before and after every attempt to send an API request (requests that are retried call them again).
+    Methods can be called from many threads at the same time.
+
+    Both get a dictionary with request information:
+
+    * method - HTTP method
+    * url - full URL
+    * template - URL template the URL was made from
+    * params - query parameters (or None)
+    * attempt - 0 for the first attempt, 1 for the first retry and so on
+    * timestamp - time when the attempt started (seconds since epoch)
+
+    after_request gets also:
+
+    * status - HTTP status of the response, or None if the request failed
+    * error - description of the error if request failed (or None)
+    * retry_delay - number of seconds until the request is repeated, or None if it won't be repeated
+    * timings - dictionary of durations in seconds: dns, connect, tls (None if an existing connection was reused),
+      ttfb (until response headers were received) and total (including response body, unless it is streamed)
+    """
+
+    def before_request(self, info):
+        """Called before a request is sent."""
+
+    def after_request(self, info):
+        """Called after a response is received (or the request failed)."""
+
+
+class JsonLinesTrace(RequestHooks):
+    """
+    Writes information about every completed request to a file-like object, as one JSON object per line.
+    Fields are the same as in the dictionary passed to RequestHooks.after_request.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+        self._lock = threading.Lock()
+
+    def after_request(self, info):
+        line = json.dumps(info, default=str, sort_keys=True)
+        with self._lock:
+            self.fp.write(line + '\n')
+            self.fp.flush()
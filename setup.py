@@ -38,6 +38,7 @@ args = dict(
     test_suite="egnyte",
     extras_require={
         'docs': ['sphinx', 'sphinx-argparse'],
+        'async': ['aiohttp'],
     },
     entry_points={
         "console_scripts": [